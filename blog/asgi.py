@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.settings')
+# serve the async read views (blog.asgi_urls)
+os.environ.setdefault('BLOG_ASGI', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,12 @@
+"""
+URLconf for the ASGI deployment (BLOG_ASGI=1): the async read views from
+blogapp.async_urls take precedence, everything else is blog.urls.
+"""
+from django.urls import include, path
+
+from .urls import handler404, urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', include('blogapp.async_urls')),
+    *sync_urlpatterns,
+]
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
@@ -51,12 +52,15 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # =========================
 MIDDLEWARE = [
+    # outermost, so session/auth queries are counted too
+    "blogapp.instrumentation.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "blogapp.routers.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -64,7 +68,11 @@ MIDDLEWARE = [
 # =========================
 # URLS / TEMPLATES
 # =========================
-ROOT_URLCONF = "blog.urls"
+# blog/asgi.py sets BLOG_ASGI=1: the read-heavy pages are then served by the
+# async views in blogapp.async_views
+BLOG_ASGI = os.environ.get("BLOG_ASGI") == "1"
+
+ROOT_URLCONF = "blog.asgi_urls" if BLOG_ASGI else "blog.urls"
 
 TEMPLATES = [
     {
@@ -77,6 +85,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "blogapp.context_processors.notifications",
             ],
         },
     },
@@ -87,13 +96,72 @@ WSGI_APPLICATION = "blog.wsgi.application"
 # =========================
 # DATABASE
 # =========================
+DATABASE_ROUTERS = []
+
+# Under ASGI sync ORM work runs on per-request threads, so a persistent
+# connection is never reused and only piles up (Django ticket #33497), all
+# the more with long-lived SSE streams open: close them after each request.
+CONN_MAX_AGE = 0 if BLOG_ASGI else 600
+
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
+        conn_max_age=CONN_MAX_AGE,
     )
 }
 
+# SQLite under several gunicorn workers: WAL lets readers run alongside the
+# writer, busy_timeout ("timeout", in seconds) queues writers instead of
+# failing with "database is locked", and BEGIN IMMEDIATE takes the write
+# lock up front so two transactions never deadlock upgrading a read lock.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))}",
+    f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_KB', 20000))}",
+    "PRAGMA temp_store=MEMORY",
+]
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": ";".join(SQLITE_PRAGMAS),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 20)),
+    }
+
+    # SQLITE_READ_CONNECTION=1: reads go through a second, read-only
+    # connection (see blogapp.routers.SQLiteReadWriteRouter)
+    if os.environ.get("SQLITE_READ_CONNECTION") == "1":
+        DATABASES["reader"] = {
+            **DATABASES["default"],
+            "NAME": f"file:{DATABASES['default']['NAME']}?mode=ro",
+            "OPTIONS": {
+                "init_command": ";".join(SQLITE_PRAGMAS[1:]) + ";PRAGMA query_only=ON",
+                "timeout": DATABASES["default"]["OPTIONS"]["timeout"],
+            },
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_ROUTERS.append("blogapp.routers.SQLiteReadWriteRouter")
+
+# Read replicas: DATABASE_REPLICA_URLS="postgres://...,postgres://..." adds
+# replica_0, replica_1, ... Only views wrapped in blogapp.routers.replica_reads
+# read from them, and a client that just wrote is pinned to the primary for
+# REPLICA_PIN_SECONDS so it sees its own changes.
+DATABASE_REPLICAS = []
+for url in filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")):
+    alias = f"replica_{len(DATABASE_REPLICAS)}"
+    DATABASES[alias] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=CONN_MAX_AGE),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS.insert(0, "blogapp.routers.ReplicaRouter")
+
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+
 # =========================
 # AUTH / LOGIN
 # =========================
@@ -101,6 +169,29 @@ LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "post_list"
 LOGOUT_REDIRECT_URL = "login"
 
+# "db" reads the session and the user from the database on every request.
+# "cached_db" and "signed_cookies" skip the session query, and the user
+# is served from AUTH_USER_CACHE (see blogapp.authcache). Both caches are
+# the fragments cache, which must be shared between workers: with a
+# per-process cache a logout, password change or deactivation would only
+# reach the worker that handled it (checked under CACHES below).
+SESSION_MODE = os.environ.get("SESSION_MODE", "db")
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = "fragments"
+
+if SESSION_MODE != "db":
+    AUTHENTICATION_BACKENDS = ["blogapp.authcache.CachedModelBackend"]
+
+AUTH_USER_CACHE = "fragments"
+AUTH_USER_TIMEOUT = 5 * 60
+
 # =========================
 # PASSWORD VALIDATION
 # =========================
@@ -125,20 +216,41 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-if not DEBUG:
-    STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
-
 # =========================
 # MEDIA / CLOUDINARY CONFIG
 # =========================
 MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
 
-STORAGES = {
-    "default": {
+# "local" keeps media on disk instead of Cloudinary (offline dev and tests)
+MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "cloudinary")
+
+MEDIA_STORAGES = {
+    "cloudinary": {
         "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
     },
+    "local": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+}
+
+STORAGES = {
+    "default": MEDIA_STORAGES[MEDIA_STORAGE],
+    # minified, fingerprinted, gzip + brotli (see blogapp.assets). Deploy
+    # builds run `manage.py build_assets` then `manage.py check --deploy`,
+    # which fails while staticfiles.json is missing
     "staticfiles": {
-        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        "BACKEND": "blogapp.assets.AssetStorage",
+    },
+    # uploads waiting for the job worker (blogapp.images.queue_upload);
+    # web and worker processes must share this directory
+    "image_staging": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.environ.get(
+                "IMAGE_STAGING_DIR", str(BASE_DIR / ".cache" / "uploads")
+            ),
+        },
     },
 }
 
@@ -150,6 +262,134 @@ CLOUDINARY_STORAGE = {
     "API_SECRET": "RX_jhj47RixXw-NB6NUOonpJwbE",
 }
 
+# profile pictures build their URLs through the SDK directly, which is
+# otherwise only configured once the media storage has been loaded
+cloudinary.config(
+    cloud_name=CLOUDINARY_STORAGE["CLOUD_NAME"],
+    api_key=CLOUDINARY_STORAGE["API_KEY"],
+    api_secret=CLOUDINARY_STORAGE["API_SECRET"],
+    secure=True,
+)
+
+# =========================
+# CACHES
+# =========================
+# Rendered template fragments and their version tokens (see
+# blogapp.fragments), author cards, unread counts and cached sessions.
+# Invalidation only works if every worker sees the same entries, so this
+# cache must be shared: "file" between the processes of one host, "redis"
+# between hosts.
+FRAGMENT_CACHE_BACKEND = os.environ.get("FRAGMENT_CACHE_BACKEND", "file")
+
+FRAGMENT_CACHES = {
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "FRAGMENT_CACHE_DIR", str(BASE_DIR / ".cache" / "fragments")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    # shared between hosts too; needs the redis package
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fragments": FRAGMENT_CACHES[FRAGMENT_CACHE_BACKEND],
+}
+
+# backends whose entries are invisible to other worker processes
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+# backends whose incr() and add() are single atomic operations; the others
+# implement them as a get followed by a set
+ATOMIC_CACHE_BACKENDS = {
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+}
+
+
+def _is_process_local(alias):
+    return CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def _is_atomic(alias):
+    return CACHES[alias]["BACKEND"] in ATOMIC_CACHE_BACKENDS
+
+
+if _is_process_local("fragments"):
+    raise ImproperlyConfigured(
+        "The 'fragments' cache is process-local: a post edit, like or comment "
+        "would only invalidate fragments in the worker that handled it."
+    )
+
+if SESSION_MODE != "db":
+    for _alias in {SESSION_CACHE_ALIAS, AUTH_USER_CACHE}:
+        if _is_process_local(_alias):
+            raise ImproperlyConfigured(
+                f"SESSION_MODE={SESSION_MODE!r} needs a cache shared between "
+                f"workers, but the {_alias!r} cache is process-local; use "
+                f"a shared cache or SESSION_MODE=db."
+            )
+
+# Author cards (see blogapp.usercards) share the fragments cache, so an
+# invalidation reaches every worker.
+USER_CARD_CACHE = "fragments"
+USER_CARD_TIMEOUT = 60 * 60
+
+# unread notification counts (see blogapp.notifications)
+NOTIFICATION_CACHE = "fragments"
+
+if _is_process_local(NOTIFICATION_CACHE):
+    raise ImproperlyConfigured(
+        f"NOTIFICATION_CACHE={NOTIFICATION_CACHE!r} is process-local: a new "
+        f"or read notification would only reset the count in one worker."
+    )
+
+# Cache-Control max-age for anonymous post, list and search pages (see
+# blogapp.conditional); logged-in pages always revalidate
+ANONYMOUS_PAGE_MAX_AGE = int(os.environ.get("ANONYMOUS_PAGE_MAX_AGE", 60))
+
+# =========================
+# VIEW COUNTER
+# =========================
+# "local" buffers views per process, "cache" shares the buffer through
+# VIEW_COUNTER_CACHE so `manage.py flush_view_counts` can drain it; that
+# cache must count atomically across processes (FRAGMENT_CACHE_BACKEND=redis
+# or memcached; the file cache's incr is a read followed by a write).
+VIEW_COUNTER_BACKEND = os.environ.get("VIEW_COUNTER_BACKEND", "local")
+VIEW_COUNTER_CACHE = os.environ.get("VIEW_COUNTER_CACHE", "fragments")
+VIEW_COUNTER_FLUSH_INTERVAL = 10  # seconds
+VIEW_COUNTER_FLUSH_THRESHOLD = 100  # pending views
+
+if VIEW_COUNTER_BACKEND == "cache" and not _is_atomic(VIEW_COUNTER_CACHE):
+    raise ImproperlyConfigured(
+        f"VIEW_COUNTER_BACKEND='cache' needs a cache shared between "
+        f"processes with atomic incr/add (Redis or Memcached), but the "
+        f"{VIEW_COUNTER_CACHE!r} cache is {CACHES[VIEW_COUNTER_CACHE]['BACKEND']}; "
+        f"concurrent views would be lost."
+    )
+
+# =========================
+# LIVE UPDATES
+# =========================
+# Server-Sent Events at /events/ (ASGI only, see blogapp.pubsub).
+# "local" reaches subscribers in the same worker process.
+PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "local")
+SSE_HEARTBEAT = 15  # seconds between keep-alive comments
+SSE_COUNT_DELAY = 1  # seconds count changes are gathered before a push
+SSE_MAX_AGE = 5 * 60  # seconds before a stream ends and the browser reconnects
+
 # =========================
 # CKEDITOR
 # =========================
@@ -158,4 +398,50 @@ CKEDITOR_UPLOAD_PATH = "uploads/"
 # =========================
 # DEFAULT PRIMARY KEY
 # =========================
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# =========================
+# INSTRUMENTATION
+# =========================
+# per-request query counts and timings, see blogapp.instrumentation
+INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED", "1") == "1"
+
+# maximum queries per URL name; over budget is logged, or raises with
+# QUERY_BUDGET_STRICT (blogapp.testing.strict_query_budgets)
+QUERY_BUDGETS = {
+    "post_list": 6,
+    "feed": 6,
+    "post_detail": 8,
+    "comment_replies": 3,
+    "dashboard": 8,
+    "my_posts": 5,
+    "profile": 6,
+    "user_profile": 6,
+    "author_posts": 5,
+    "search_posts": 8,
+    "notifications": 8,
+    # a like is 9 statements: session + user, BEGIN, insert (user-011),
+    # like_count (user-002), author stats (user-025), the queued rollup and
+    # notification job (user-011), the like_count read back, COMMIT.
+    # toggle may try its delete first; a batch that likes some posts and
+    # unlikes others moves the counters in two UPDATEs each, then reads
+    # the states back
+    "like_post": 10,
+    "toggle_like": 10,
+    "like_batch": 14,
+}
+QUERY_BUDGET_STRICT = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "blogapp": {
+            "handlers": ["console"],
+            "level": os.environ.get("BLOGAPP_LOG_LEVEL", "INFO"),
+        },
+    },
+}
@@ -0,0 +1,122 @@
+"""
+Daily activity rollups for author dashboards.
+
+The write paths that already touch a post's counters also add to that
+post's PostDailyStats row for today: buffered views when they are flushed
+(viewcounts.write_views), likes and comments from their signals. The
+dashboard then reads a handful of pre-aggregated rows per day instead of
+walking every post the author has written.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Post, PostDailyStats
+
+
+RANGES = (7, 30, 90)
+DEFAULT_RANGE = 30
+TOP_POSTS = 5
+
+FIELDS = ("views", "likes", "comments")
+
+Series = namedtuple("Series", ["labels", "views", "likes", "comments"])
+TopPost = namedtuple("TopPost", ["post_id", "title", "views", "likes", "comments"])
+
+
+# =========================
+# WRITING
+# =========================
+def add(field, counts, day=None):
+    """
+    Add ``counts`` ({post_id: n}) to ``field`` of each post's row for
+    ``day`` (today by default), creating rows as needed.
+    """
+    if field not in FIELDS:
+        raise ValueError(field)
+    counts = {post_id: n for post_id, n in counts.items() if n}
+    if not counts:
+        return
+    day = day or timezone.localdate()
+
+    with transaction.atomic():
+        rows = PostDailyStats.objects.filter(date=day)
+        existing = set(
+            rows.filter(post_id__in=counts).values_list("post_id", flat=True)
+        )
+        missing = counts.keys() - existing
+        if missing:
+            # posts that no longer exist simply get no row
+            authors = Post.objects.filter(pk__in=missing).values_list("pk", "author_id")
+            PostDailyStats.objects.bulk_create(
+                [
+                    PostDailyStats(post_id=post_id, author_id=author_id, date=day)
+                    for post_id, author_id in authors
+                ],
+                # another process may have created the row meanwhile
+                ignore_conflicts=True,
+            )
+
+        by_amount = defaultdict(list)
+        for post_id, n in counts.items():
+            by_amount[n].append(post_id)
+        for n, post_ids in by_amount.items():
+            rows.filter(post_id__in=post_ids).update(**{field: F(field) + n})
+
+
+# =========================
+# READING
+# =========================
+def clean_range(value):
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RANGE
+    return days if days in RANGES else DEFAULT_RANGE
+
+
+def _window(days):
+    today = timezone.localdate()
+    return today - timedelta(days=days - 1), today
+
+
+def author_series(author, days=DEFAULT_RANGE):
+    """Zero-filled daily totals over the last ``days`` days, oldest first."""
+    start, end = _window(days)
+    totals = {
+        row["date"]: row
+        for row in (
+            PostDailyStats.objects
+            .filter(author=author, date__range=(start, end))
+            .values("date")
+            .annotate(views=Sum("views"), likes=Sum("likes"), comments=Sum("comments"))
+            .order_by()
+        )
+    }
+
+    dates = [start + timedelta(days=i) for i in range(days)]
+    empty = dict.fromkeys(FIELDS, 0)
+    return Series(
+        labels=[d.strftime("%b %d") for d in dates],
+        views=[totals.get(d, empty)["views"] for d in dates],
+        likes=[totals.get(d, empty)["likes"] for d in dates],
+        comments=[totals.get(d, empty)["comments"] for d in dates],
+    )
+
+
+def top_posts(author, days=DEFAULT_RANGE, limit=TOP_POSTS):
+    start, end = _window(days)
+    rows = (
+        PostDailyStats.objects
+        .filter(author=author, date__range=(start, end))
+        .values("post_id", "post__title")
+        .annotate(views=Sum("views"), likes=Sum("likes"), comments=Sum("comments"))
+        .order_by("-views", "-likes", "-comments")[:limit]
+    )
+    return [
+        TopPost(r["post_id"], r["post__title"], r["views"], r["likes"], r["comments"])
+        for r in rows
+    ]
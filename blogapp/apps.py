@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BlogappConfig(AppConfig):
     name = 'blogapp'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+        # registers the staticfiles manifest deploy check
+        from . import assets  # noqa: F401
+        # registers the job handlers
+        from . import images  # noqa: F401
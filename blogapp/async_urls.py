@@ -0,0 +1,13 @@
+from django.urls import path
+from . import async_views
+
+# same names as in blogapp.urls, which these shadow under ASGI
+urlpatterns = [
+    path('', async_views.post_list, name='post_list'),
+    path('feed/', async_views.feed_view, name='feed'),
+    path('notifications/', async_views.notifications, name='notifications'),
+    path('post/<int:id>/', async_views.post_detail, name='post_detail'),
+    path("search/", async_views.search_posts, name="search_posts"),
+    # ASGI only
+    path("events/", async_views.events, name="events"),
+]
@@ -0,0 +1,249 @@
+"""
+Async versions of the read-heavy views, served when the site runs under
+ASGI (blog/asgi.py sets BLOG_ASGI=1, see blog.asgi_urls).
+
+Data is loaded with the async ORM and independent lookups are awaited
+together with asyncio.gather(). Django still runs each query on a worker
+thread, so the win is that the event loop serves other requests while
+these wait. Templates are rendered with sync_to_async() because context
+processors and lazy template lookups may touch the database. Writes and
+anything not listed here stay on the sync views in blogapp.views.
+
+``events`` is the Server-Sent Events stream behind the live counts and
+notifications; it only exists here, since a WSGI worker would be tied up
+for as long as the stream stays open.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Value
+from django.db.models.functions import Upper
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from . import fragments, pubsub, search, views
+from .comments import comment_threads
+from .conditional import (
+    cacheable,
+    post_etag,
+    post_last_modified,
+    post_list_etag,
+    post_list_last_modified,
+    search_etag,
+)
+from .feed import InvalidCursor, aget_feed_page
+from .likes import Like
+from .models import Notification, Post
+from .notifications import mark_read, unread_count
+from .routers import replica_reads
+from .viewcounts import counts_views
+
+
+arender = sync_to_async(render)
+
+# posts one stream may follow, a page's worth
+MAX_WATCHED_POSTS = 50
+
+# EventSource reconnect delay after a stream ends
+RETRY_MS = 3000
+
+
+async def _viewer(request):
+    # templates and context processors read request.user, which auser()
+    # doesn't fill in: without this the user is loaded a second time
+    request.user = await request.auser()
+    return request.user
+
+
+async def _feed_page(request, viewer):
+    try:
+        return await aget_feed_page(viewer, request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid feed cursor")
+
+
+async def _is_liked(viewer, post_id):
+    if not viewer.is_authenticated:
+        return False
+    return await Like.objects.filter(post_id=post_id, user_id=viewer.pk).aexists()
+
+
+# =========================
+# FEEDS
+# =========================
+@login_required
+@replica_reads
+async def feed_view(request):
+    page = await _feed_page(request, await _viewer(request))
+    fragments.attach_versions(page.posts)
+    return await arender(request, "blog/feed.html", {
+        "posts": page.posts,
+        "next_cursor": page.next_cursor,
+    })
+
+
+@replica_reads
+@cacheable(post_list_etag, post_list_last_modified)
+async def post_list(request):
+    page = await _feed_page(request, await _viewer(request))
+    return await arender(request, "blog/post_list.html", {
+        "posts": page.posts,
+        "next_cursor": page.next_cursor,
+    })
+
+
+# =========================
+# POST DETAIL
+# =========================
+@replica_reads
+@counts_views
+@cacheable(post_etag, post_last_modified)
+async def post_detail(request, id):
+    if request.method != "GET":
+        # comments are posted through the sync view
+        return await sync_to_async(views.post_detail)(request, id=id)
+
+    viewer = await _viewer(request)
+    post = await aget_object_or_404(Post.objects.select_related("author"), id=id)
+    post.cache_version = fragments.get_versions([post.pk])[post.pk]
+
+    comments, is_liked = await asyncio.gather(
+        sync_to_async(comment_threads)(post, request.GET.get("comments")),
+        _is_liked(viewer, post.pk),
+    )
+    return await arender(request, "blog/post_detail.html", {
+        "post": post,
+        "is_liked": is_liked,
+        "comments": comments,
+    })
+
+
+# =========================
+# SEARCH
+# =========================
+@replica_reads
+@cacheable(search_etag)
+async def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    viewer = await _viewer(request)
+
+    # most searches are not usernames: look for both at once
+    user, posts = await asyncio.gather(
+        get_user_model().objects
+        .alias(username_upper=Upper("username"))
+        .filter(username_upper=Upper(Value(query)))
+        .afirst(),
+        sync_to_async(search.search_posts)(query, request.GET.get("page"), viewer=viewer),
+    )
+    if user is not None:
+        return redirect("user_profile", username=user.username)
+
+    return await arender(request, "blog/search_results.html", {
+        "query": query,
+        "posts": posts,
+    })
+
+
+# =========================
+# NOTIFICATIONS
+# =========================
+@login_required
+async def notifications(request):
+    viewer = await _viewer(request)
+    rows = Notification.objects.filter(user=viewer).order_by("-created_at", "-id")
+
+    paginator = Paginator(rows, views.NOTIFICATIONS_PER_PAGE)
+    paginator.count = await rows.acount()
+    page = paginator.get_page(request.GET.get("page"))
+    page.object_list = [n async for n in page.object_list]
+
+    await sync_to_async(mark_read)(viewer, [n.id for n in page if not n.is_read])
+
+    return await arender(request, "blog/notifications.html", {
+        "notifications": page
+    })
+
+
+# =========================
+# LIVE UPDATES
+# =========================
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _counts(post_ids):
+    rows = Post.objects.filter(pk__in=post_ids).values_list("pk", "like_count", "comment_count")
+    return {
+        pk: {"likes": likes, "comments": comments}
+        async for pk, likes, comments in rows
+    }
+
+
+async def _event_stream(viewer, post_ids):
+    channels = [pubsub.post_channel(post_id) for post_id in post_ids]
+    if viewer.is_authenticated:
+        channels.append(pubsub.user_channel(viewer.pk))
+
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + settings.SSE_MAX_AGE
+    # posts whose counts moved, pushed together once push_at is reached
+    changed, push_at = set(), None
+
+    with pubsub.get_broker().subscribe(channels) as subscription:
+        yield f"retry: {RETRY_MS}\n\n"
+        # subscribed first, so nothing falls between the snapshot and the stream
+        if post_ids:
+            yield _sse("counts", await _counts(post_ids))
+
+        while loop.time() < closes_at:
+            now = loop.time()
+            deadline = min(push_at or now + settings.SSE_HEARTBEAT, closes_at)
+            try:
+                message = await asyncio.wait_for(subscription.get(), deadline - now)
+            except asyncio.TimeoutError:
+                if changed:
+                    yield _sse("counts", await _counts(changed))
+                    changed, push_at = set(), None
+                else:
+                    yield ": keep-alive\n\n"
+                continue
+
+            if message is None:
+                break
+            if message["type"] == "post":
+                if not changed:
+                    push_at = loop.time() + settings.SSE_COUNT_DELAY
+                changed.add(message["id"])
+            elif message["type"] == "notification":
+                yield _sse("notification", {
+                    **message,
+                    "url": reverse("notification_redirect", args=[message["id"]]),
+                    "unread": await sync_to_async(unread_count)(viewer),
+                })
+
+
+@require_GET
+async def events(request):
+    """
+    Server-Sent Events for the posts listed as ``?post=<id>`` (their like
+    and comment counts) and, for a logged-in viewer, their notifications.
+    """
+    viewer = await request.auser()
+    post_ids = {int(p) for p in request.GET.getlist("post") if p.isdigit()}
+    post_ids = sorted(post_ids)[:MAX_WATCHED_POSTS]
+
+    response = StreamingHttpResponse(
+        _event_stream(viewer, post_ids),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # let nginx pass events through as they come
+    response["X-Accel-Buffering"] = "no"
+    return response
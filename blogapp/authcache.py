@@ -0,0 +1,85 @@
+"""
+Cached authentication.
+
+AuthenticationMiddleware loads the logged-in User on every request.
+CachedModelBackend keeps that row in settings.AUTH_USER_CACHE for
+AUTH_USER_TIMEOUT seconds, so together with a cached_db or signed-cookie
+session (settings.SESSION_MODE) an authenticated request starts without
+any query. Signals drop the cached user whenever it is saved or deleted,
+which covers password changes: the session hash check in
+django.contrib.auth.get_user() then sees the new password and logs other
+sessions out. Changes made with QuerySet.update() are picked up when the
+entry times out.
+
+A cached user may be older than the row, so saving it must not write the
+old values back: refresh_unchanged() (run on pre_save) reloads every field
+the request didn't change before the save goes out.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def _key(user_id):
+    return f"auth-user:{user_id}"
+
+
+# the field values a user had when it came out of the cache
+SNAPSHOT = "_auth_cache_snapshot"
+
+
+def _values(user, attnames):
+    return {name: getattr(user, name) for name in attnames}
+
+
+def forget(user_ids):
+    _cache().delete_many([_key(user_id) for user_id in user_ids])
+
+
+def refresh_unchanged(user, update_fields=None):
+    """
+    Before a user served from the cache is saved, replace the fields about
+    to be written that the request left alone with their current values
+    from the database, in one query.
+    """
+    snapshot = user.__dict__.pop(SNAPSHOT, None)
+    if snapshot is None:
+        return
+    unchanged = [
+        field.attname
+        for field in user._meta.concrete_fields
+        if not field.primary_key
+        and (
+            update_fields is None
+            or field.name in update_fields
+            or field.attname in update_fields
+        )
+        and getattr(user, field.attname) == snapshot[field.attname]
+    ]
+    if not unchanged:
+        return
+    current = type(user)._base_manager.filter(pk=user.pk).values(*unchanged).first()
+    for name, value in (current or {}).items():
+        setattr(user, name, value)
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        cache = _cache()
+        user = cache.get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(_key(user_id), user, timeout=settings.AUTH_USER_TIMEOUT)
+        else:
+            user.__dict__[SNAPSHOT] = _values(
+                user, [field.attname for field in user._meta.concrete_fields]
+            )
+        # is_active may have changed since the login
+        return user if self.user_can_authenticate(user) else None
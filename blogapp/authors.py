@@ -0,0 +1,90 @@
+"""
+Author profile pages.
+
+The header reads the author's AuthorStats row instead of summing over all
+of their posts, and the posts are listed a page at a time with the feed's
+(created_at, id) cursor. Further pages come from the ``author_posts``
+endpoint as JSON ({"html": ..., "next_cursor": ...}) while the reader
+scrolls; without JavaScript the "Older posts" link loads them as a page.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.db.models import Q
+from django.utils import timezone
+
+from . import feed
+from .models import AuthorStats, Post
+
+
+PAGE_SIZE = 10
+
+
+def _create_stats(user):
+    """
+    Count the author's posts and insert their AuthorStats row in one
+    statement; None if another request inserted it first.
+    """
+    connection = connections[router.db_for_write(AuthorStats)]
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        # the WHERE also keeps SQLite from reading ON CONFLICT as a join constraint
+        cursor.execute(
+            f"INSERT INTO {AuthorStats._meta.db_table} "
+            f"(user_id, post_count, total_views, total_likes, updated_at) "
+            f"SELECT %s, COUNT(*), COALESCE(SUM(views), 0), COALESCE(SUM(like_count), 0), %s "
+            f"FROM {Post._meta.db_table} WHERE author_id = %s "
+            f"ON CONFLICT DO NOTHING RETURNING id, post_count, total_views, total_likes",
+            [
+                user.pk,
+                AuthorStats._meta.get_field("updated_at").get_db_prep_value(now, connection),
+                user.pk,
+            ],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    pk, post_count, total_views, total_likes = row
+    return AuthorStats(
+        pk=pk,
+        user=user,
+        post_count=post_count,
+        total_views=total_views,
+        total_likes=total_likes,
+        updated_at=now,
+    )
+
+
+def get_stats(user):
+    """The user's AuthorStats; free when loaded with select_related("author_stats")."""
+    if get_user_model().author_stats.is_cached(user):
+        try:
+            return user.author_stats
+        except AuthorStats.DoesNotExist:
+            pass
+    else:
+        stats = AuthorStats.objects.filter(user=user).first()
+        if stats is not None:
+            return stats
+
+    # first visit: count once, the write paths keep it current from here
+    return _create_stats(user) or AuthorStats.objects.get(user=user)
+
+
+def get_posts_page(author, cursor=None, page_size=PAGE_SIZE):
+    """
+    One page of the author's posts, newest first, on post_author_feed_idx.
+    The rows only print title, date and excerpt, so unlike the feed there
+    are no like states, image variants or author cards to load.
+    """
+    posts = Post.objects.filter(author=author).for_list()
+    if cursor:
+        created_at, pk = feed.decode_cursor(cursor)
+        posts = posts.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    posts = list(posts.order_by("-created_at", "-pk")[:page_size + 1])
+
+    has_more = len(posts) > page_size
+    posts = posts[:page_size]
+    next_cursor = feed.encode_cursor(posts[-1]) if has_more else None
+    return feed.FeedPage(posts, next_cursor, has_more)
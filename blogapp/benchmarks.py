@@ -0,0 +1,292 @@
+"""
+Request benchmarks for the hot views.
+
+Each scenario is driven through the Django test client against whatever
+database is configured (fill it with ``manage.py generate_blog_data``), so
+the numbers include middleware, template rendering and every query. The
+runner reports p50/p95 latency, queries per request and peak Python memory
+allocated while serving one request, and can compare a run with a stored
+baseline. ``manage.py run_benchmarks`` is the command line front end.
+
+The throughput section drives the read-only scenarios with many clients at
+once, through the sync views (a thread per client) and through the async
+views used under ASGI (tasks on one event loop), and reports requests per
+second for each; ``manage.py run_throughput`` runs it.
+"""
+import asyncio
+import json
+import logging
+import math
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Post
+
+
+Scenario = namedtuple("Scenario", ["name", "method", "path", "body"])
+Result = namedtuple(
+    "Result", ["name", "status", "p50_ms", "p95_ms", "mean_ms", "queries", "peak_kb"]
+)
+Throughput = namedtuple(
+    "Throughput", ["name", "mode", "concurrency", "requests", "errors", "rps", "p95_ms"]
+)
+
+# p95 may grow by this fraction over the baseline before it is a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+# =========================
+# FIXTURES
+# =========================
+def _viewer():
+    # the busiest author: biggest dashboard and notification inbox
+    return (
+        get_user_model().objects
+        .annotate(n=Count("post"))
+        .order_by("-n", "pk")
+        .first()
+    )
+
+
+def _hot_post():
+    return Post.objects.order_by("-comment_count", "-like_count", "pk").first()
+
+
+def _search_term():
+    post = Post.objects.order_by("-like_count", "pk").only("title").first()
+    words = post.title.split() if post else []
+    return words[0] if words else "django"
+
+
+def _host():
+    hosts = [h for h in settings.ALLOWED_HOSTS if h not in ("*", "")]
+    return hosts[0].lstrip(".") if hosts else "localhost"
+
+
+def build_scenarios():
+    post = _hot_post()
+    if post is None:
+        raise LookupError("No posts to benchmark; run manage.py generate_blog_data first.")
+
+    return [
+        Scenario("post_list", "get", reverse("post_list"), None),
+        Scenario("feed", "get", reverse("feed"), None),
+        Scenario("post_detail", "get", reverse("post_detail", args=[post.pk]), None),
+        Scenario("search_posts", "get", reverse("search_posts") + f"?q={_search_term()}", None),
+        Scenario("dashboard", "get", reverse("dashboard"), None),
+        # body is filled per iteration so the like state alternates
+        Scenario("toggle_like", "post", reverse("toggle_like"), {"post_id": post.pk}),
+        Scenario("notifications", "get", reverse("notifications"), None),
+    ]
+
+
+# =========================
+# RUNNER
+# =========================
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _request(client, scenario, iteration):
+    if scenario.method == "get":
+        return client.get(scenario.path)
+
+    body = dict(scenario.body)
+    if scenario.name == "toggle_like":
+        # explicit states keep the like count stable across runs
+        body["liked"] = iteration % 2 == 0
+    return client.post(scenario.path, json.dumps(body), content_type="application/json")
+
+
+def run_scenario(client, scenario, iterations, warmup):
+    for i in range(warmup):
+        _request(client, scenario, i)
+
+    timings, queries = [], []
+    status = None
+    for i in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = _request(client, scenario, i)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        status = response.status_code
+
+    # one more request under tracemalloc, which would skew the timings
+    tracemalloc.start()
+    try:
+        _request(client, scenario, iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=scenario.name,
+        status=status,
+        p50_ms=round(percentile(timings, 0.50), 2),
+        p95_ms=round(percentile(timings, 0.95), 2),
+        mean_ms=round(statistics.fmean(timings), 2),
+        queries=max(queries),
+        peak_kb=round(peak / 1024, 1),
+    )
+
+
+def run(iterations=30, warmup=3, only=None, viewer=None):
+    viewer = viewer or _viewer()
+    client = Client(HTTP_HOST=_host())
+    client.force_login(viewer)
+
+    # one log line per request would drown the report
+    request_log = logging.getLogger("blogapp.instrumentation")
+    level = request_log.level
+    request_log.setLevel(logging.WARNING)
+    try:
+        results = []
+        for scenario in build_scenarios():
+            if only and scenario.name not in only:
+                continue
+            results.append(run_scenario(client, scenario, iterations, warmup))
+    finally:
+        request_log.setLevel(level)
+    return results
+
+
+# =========================
+# BASELINES
+# =========================
+def to_json(results):
+    return {result.name: result._asdict() for result in results}
+
+
+def save_baseline(results, path):
+    with open(path, "w") as fh:
+        json.dump(to_json(results), fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Regressions against a baseline as (name, message) pairs: more queries
+    than before, or a p95 more than ``tolerance`` slower.
+    """
+    regressions = []
+    for result in results:
+        before = baseline.get(result.name)
+        if before is None:
+            continue
+        if result.queries > before["queries"]:
+            regressions.append((
+                result.name,
+                f"queries {before['queries']} -> {result.queries}",
+            ))
+        if result.p95_ms > before["p95_ms"] * (1 + tolerance):
+            regressions.append((
+                result.name,
+                f"p95 {before['p95_ms']}ms -> {result.p95_ms}ms",
+            ))
+    return regressions
+
+
+# =========================
+# THROUGHPUT
+# =========================
+# scenarios served by blogapp.async_views under ASGI
+THROUGHPUT_SCENARIOS = ("post_list", "feed", "post_detail", "search_posts", "notifications")
+
+
+def _summary(scenario, mode, concurrency, outcomes, elapsed):
+    timings = [ms for _, ms in outcomes]
+    return Throughput(
+        name=scenario.name,
+        mode=mode,
+        concurrency=concurrency,
+        requests=len(outcomes),
+        errors=sum(1 for status, _ in outcomes if status != 200),
+        rps=round(len(outcomes) / elapsed, 1),
+        p95_ms=round(percentile(timings, 0.95), 2),
+    )
+
+
+def _sync_throughput(scenario, viewer, requests, concurrency):
+    def worker(count):
+        # test clients are not thread-safe: one per thread
+        client = Client(HTTP_HOST=_host())
+        client.force_login(viewer)
+        outcomes = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.get(scenario.path)
+            outcomes.append((response.status_code, (time.perf_counter() - start) * 1000))
+        connection.close()
+        return outcomes
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = [o for part in pool.map(worker, shares) for o in part]
+    return _summary(scenario, "sync", concurrency, outcomes, time.perf_counter() - start)
+
+
+async def _async_throughput(scenario, viewer, requests, concurrency):
+    client = AsyncClient()
+    await client.aforce_login(viewer)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            response = await client.get(scenario.path)
+            return response.status_code, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one() for _ in range(requests)))
+    return _summary(scenario, "async", concurrency, outcomes, time.perf_counter() - start)
+
+
+def run_throughput(requests=200, concurrency=16, only=None, viewer=None):
+    """
+    Serve every read-only scenario ``requests`` times with ``concurrency``
+    clients in flight, first through the sync views, then the async ones.
+    """
+    viewer = viewer or _viewer()
+    scenarios = [
+        scenario for scenario in build_scenarios()
+        if scenario.name in THROUGHPUT_SCENARIOS and (not only or scenario.name in only)
+    ]
+
+    request_log = logging.getLogger("blogapp.instrumentation")
+    level = request_log.level
+    request_log.setLevel(logging.WARNING)
+    # AsyncClient always sends "Host: testserver"
+    hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+    try:
+        results = []
+        for scenario in scenarios:
+            _sync_throughput(scenario, viewer, concurrency, concurrency)
+            results.append(_sync_throughput(scenario, viewer, requests, concurrency))
+            with override_settings(ROOT_URLCONF="blog.asgi_urls", ALLOWED_HOSTS=hosts):
+                asyncio.run(_async_throughput(scenario, viewer, concurrency, concurrency))
+                results.append(
+                    asyncio.run(_async_throughput(scenario, viewer, requests, concurrency))
+                )
+    finally:
+        request_log.setLevel(level)
+    return results
@@ -0,0 +1,126 @@
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.http import Http404
+
+from .models import Comment
+
+
+THREADS_PER_PAGE = 20
+MAX_DEPTH = 4
+
+
+# =========================
+# LOADING
+# =========================
+def _comments(queryset):
+    return list(
+        queryset
+        .select_related("user")
+        .only(
+            "id", "post_id", "parent_id", "content", "created_at",
+            "user__id", "user__username",
+        )
+        .order_by("created_at", "id")
+    )
+
+
+def _walk(roots, depth=0):
+    # iterative pre-order walk, reply chains can be arbitrarily deep
+    stack = [(root, depth) for root in reversed(roots)]
+    while stack:
+        node, node_depth = stack.pop()
+        yield node, node_depth
+        stack.extend((child, node_depth + 1) for child in reversed(node.children))
+
+
+def _set_depths(roots, depth, max_depth):
+    for node, node_depth in _walk(roots, depth):
+        node.depth = node_depth
+        node.collapsed = bool(node.reply_count) and node_depth >= max_depth
+
+
+def build_tree(comments, max_depth=MAX_DEPTH, unloaded=None):
+    """
+    Link a flat list of comments into trees in memory and return the roots.
+
+    Every node gets ``children``, ``depth`` and ``reply_count`` (all
+    descendants, plus ``unloaded[pk]`` replies that weren't fetched). Nodes
+    at ``max_depth`` that have replies are marked ``collapsed`` so the
+    template offers to load that subtree on demand.
+    """
+    unloaded = unloaded or {}
+    by_id = {comment.pk: comment for comment in comments}
+    roots = []
+
+    for comment in comments:
+        comment.children = []
+
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.children.append(comment)
+
+    for node, _ in reversed(list(_walk(roots))):
+        node.reply_count = unloaded.get(node.pk, 0) + sum(
+            1 + child.reply_count for child in node.children
+        )
+
+    _set_depths(roots, 0, max_depth)
+    return roots
+
+
+# =========================
+# PUBLIC API
+# =========================
+def comment_threads(post, page_number=None, per_page=THREADS_PER_PAGE):
+    """
+    All comments of a post in a single query, arranged as a page of
+    top-level threads.
+    """
+    roots = build_tree(_comments(Comment.objects.filter(post=post)))
+    return Paginator(roots, per_page).get_page(page_number)
+
+
+def _subtree_ids(comment_id, max_depth):
+    """
+    Walk the replies under one comment with a recursive query: the ids
+    down to ``max_depth`` as {id: depth}, and for each comment at
+    ``max_depth`` how many replies lie below it, as {id: count}.
+    """
+    table = Comment._meta.db_table
+    with connections[router.db_for_read(Comment)].cursor() as cursor:
+        # "top" is the ancestor at max_depth of the rows below it
+        cursor.execute(
+            f"WITH RECURSIVE thread (id, depth, top) AS ("
+            f" SELECT id, 0, id FROM {table} WHERE id = %s"
+            f" UNION ALL"
+            f" SELECT c.id, t.depth + 1,"
+            f" CASE WHEN t.depth + 1 = %s THEN c.id ELSE t.top END"
+            f" FROM {table} c JOIN thread t ON c.parent_id = t.id"
+            f")"
+            f" SELECT id, depth, NULL FROM thread WHERE depth <= %s"
+            f" UNION ALL"
+            f" SELECT top, NULL, COUNT(*) FROM thread WHERE depth > %s GROUP BY top",
+            [comment_id, max_depth, max_depth, max_depth],
+        )
+        rows = cursor.fetchall()
+    depths = {pk: depth for pk, depth, count in rows if count is None}
+    unloaded = {pk: count for pk, depth, count in rows if count is not None}
+    return depths, unloaded
+
+
+def comment_subtree(comment_id, max_depth=MAX_DEPTH):
+    """
+    A single comment with its replies, for expanding a collapsed thread.
+    Loads that comment's replies down to ``max_depth`` and only counts the
+    ones further down, whatever the size of the rest of the post's thread.
+    """
+    depths, unloaded = _subtree_ids(comment_id, max_depth)
+    if not depths:
+        raise Http404("Comment not found")
+
+    comments = _comments(Comment.objects.filter(pk__in=depths))
+    # the comment itself is the only one whose parent wasn't loaded
+    return build_tree(comments, max_depth, unloaded)[0]
@@ -0,0 +1,230 @@
+"""
+Conditional GETs for the read-heavy pages.
+
+Each page gets validators that are much cheaper than rendering it: a
+post's ``updated_at`` (moved by edits and by like/comment counter
+updates) and its fragment version, the (id, updated_at) pairs of a list
+page, or the search index version. An unchanged page is answered with a
+304 before the view runs. ``cacheable`` adds Cache-Control on top: public
+with a short max-age for anonymous readers, so a CDN or reverse proxy can
+serve them, and private/no-cache (always revalidate) for everyone else.
+
+View counts are left out of the validators; they are buffered and only
+approximate anyway (see blogapp.viewcounts).
+"""
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Value
+from django.db.models.functions import Upper
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import fragments, search, usercards
+from .feed import PAGE_SIZE, InvalidCursor, decode_cursor
+from .models import AuthorStats, Post
+
+
+def _etag(*parts):
+    return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return "anonymous"
+    # pages embed a CSRF token, which changes when the secret is rotated
+    return f"{user.pk}:{request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')}"
+
+
+def _anonymous_only(last_modified_func):
+    # a date cannot tell one viewer's page from another's
+    @functools.wraps(last_modified_func)
+    def wrapper(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return last_modified_func(request, *args, **kwargs)
+    return wrapper
+
+
+# =========================
+# DECORATOR
+# =========================
+def _cache_control(request, response, authenticated):
+    if request.method not in ("GET", "HEAD") or response.status_code not in (200, 304):
+        return response
+    if authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.ANONYMOUS_PAGE_MAX_AGE)
+    return response
+
+
+def cacheable(etag_func, last_modified_func=None):
+    """condition() with the validators above, plus Cache-Control."""
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_cacheable(view, etag_func, last_modified_func)
+
+        conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            return _cache_control(request, response, request.user.is_authenticated)
+
+        return wrapper
+
+    return decorator
+
+
+def _async_cacheable(view, etag_func, last_modified_func):
+    # the validators query the database, which async code may not do
+    # directly: work them out in a thread, then hand them to condition()
+    def validators(request, *args, **kwargs):
+        return (
+            etag_func(request, *args, **kwargs),
+            last_modified_func(request, *args, **kwargs) if last_modified_func else None,
+            request.user.is_authenticated,
+        )
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # load the user once, for the validators and the view alike
+        request.user = await request.auser()
+        etag, last_modified, authenticated = await sync_to_async(validators)(
+            request, *args, **kwargs
+        )
+        conditional = condition(
+            etag_func=lambda *args, **kwargs: etag,
+            last_modified_func=lambda *args, **kwargs: last_modified,
+        )(view)
+        response = await conditional(request, *args, **kwargs)
+        return _cache_control(request, response, authenticated)
+
+    return wrapper
+
+
+# =========================
+# POST DETAIL
+# =========================
+def _post_updated_at(request, id):
+    # etag and last-modified both need it; one query per request
+    if not hasattr(request, "_post_updated_at"):
+        request._post_updated_at = (
+            Post.objects.filter(pk=id).values_list("updated_at", flat=True).first()
+        )
+    return request._post_updated_at
+
+
+def post_etag(request, id):
+    updated_at = _post_updated_at(request, id)
+    if updated_at is None:
+        return None
+    return _etag(
+        "post",
+        id,
+        updated_at.isoformat(),
+        fragments.get_versions([id])[id],
+        request.GET.get("comments", ""),
+        _viewer(request),
+    )
+
+
+@_anonymous_only
+def post_last_modified(request, id):
+    return _post_updated_at(request, id)
+
+
+# =========================
+# POST LIST
+# =========================
+def _list_rows(request):
+    if not hasattr(request, "_list_rows"):
+        rows = Post.objects.order_by("-created_at", "-pk")
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                created_at, pk = decode_cursor(cursor)
+            except InvalidCursor:
+                rows = None
+            else:
+                rows = rows.filter(created_at__lt=created_at) | rows.filter(
+                    created_at=created_at, pk__lt=pk
+                )
+        if rows is not None:
+            rows = list(rows.values_list("pk", "updated_at")[:PAGE_SIZE + 1])
+        request._list_rows = rows
+    return request._list_rows
+
+
+def post_list_etag(request):
+    rows = _list_rows(request)
+    if rows is None:
+        return None
+    return _etag("list", *(f"{pk}:{updated_at.isoformat()}" for pk, updated_at in rows))
+
+
+@_anonymous_only
+def post_list_last_modified(request):
+    rows = _list_rows(request)
+    if not rows:
+        return None
+    return max(updated_at for _, updated_at in rows)
+
+
+# =========================
+# SEARCH
+# =========================
+def search_etag(request):
+    query = request.GET.get("q", "").strip()
+    # a username match redirects, and a new user can start matching
+    User = get_user_model()
+    if User.objects.alias(username_upper=Upper("username")).filter(
+        username_upper=Upper(Value(query))
+    ).exists():
+        return None
+    # built from the database, so a post saved or deleted through any
+    # worker changes it; the index version adds author renames, which
+    # re-index posts without saving them
+    posts = Post.objects.aggregate(latest=Max("updated_at"), count=Count("pk"))
+    return _etag(
+        "search",
+        query,
+        request.GET.get("page", ""),
+        posts["latest"] and posts["latest"].isoformat(),
+        posts["count"],
+        search.index_version(),
+        _viewer(request),
+    )
+
+
+# =========================
+# PROFILE
+# =========================
+def profile_etag(request, username=None):
+    if username is None:
+        rows = AuthorStats.objects.filter(user_id=request.user.pk)
+    else:
+        rows = AuthorStats.objects.filter(user__username=username)
+    # the stats row moves with every change to the author's posts; no row
+    # yet (first visit) means no ETag
+    stats = rows.values_list(
+        "user_id", "post_count", "total_views", "total_likes", "updated_at"
+    ).first()
+    card = usercards.get_card(stats[0]) if stats else None
+    if card is None:
+        return None
+    return _etag(
+        "profile",
+        tuple(card),
+        stats,
+        request.GET.get("cursor", ""),
+        request.user.username,
+        request.user.email,
+        _viewer(request),
+    )
@@ -0,0 +1,176 @@
+"""
+Write-time processing of CKEditor post bodies.
+
+Post.save() runs render_content() so that pages can print the stored,
+already sanitized HTML and list pages can use the plain-text excerpt
+without ever loading the full body.
+"""
+import html
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator
+
+
+EXCERPT_WORDS = 30
+EXCERPT_MAX_LENGTH = 400
+
+RenderedContent = namedtuple("RenderedContent", ["html", "excerpt", "word_count"])
+
+
+# =========================
+# PLAIN TEXT
+# =========================
+BLOCK_TAG = re.compile(r"(?i)<(/?(?:p|div|br|li|h[1-6]|tr|td|th|blockquote|pre)\b)")
+
+
+def html_to_text(content):
+    text = re.sub(r"(?is)<(script|style)\b.*?</\1\s*>", " ", content or "")
+    # keep words from adjacent blocks apart once the tags are gone
+    text = html.unescape(strip_tags(BLOCK_TAG.sub(r" <\1", text)))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# =========================
+# SANITIZER
+# =========================
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "caption", "code", "div", "em",
+    "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i",
+    "img", "li", "ol", "p", "pre", "s", "span", "strike", "strong", "sub",
+    "sup", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "u", "ul",
+}
+VOID_TAGS = {"br", "hr", "img"}
+
+# dropped together with everything inside them
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "template"}
+
+ALLOWED_ATTRIBUTES = {
+    "*": {"style", "class"},
+    "a": {"href", "title", "target"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan", "scope"},
+    "ol": {"start"},
+}
+URL_ATTRIBUTES = {"href", "src"}
+ALLOWED_SCHEMES = {"", "http", "https", "mailto"}
+
+ALLOWED_STYLES = {
+    "text-align", "color", "background-color", "font-weight", "font-style",
+    "text-decoration", "width", "height", "float", "margin", "margin-left",
+    "margin-right", "border", "border-width", "border-style",
+}
+STYLE_VALUE = re.compile(r"^[#\w\s.,%()-]+$")
+
+
+def _clean_style(value):
+    kept = []
+    for declaration in value.split(";"):
+        prop, _, val = declaration.partition(":")
+        prop, val = prop.strip().lower(), val.strip()
+        if (
+            prop in ALLOWED_STYLES
+            and STYLE_VALUE.match(val)
+            and "url" not in val.lower()
+            and "expression" not in val.lower()
+        ):
+            kept.append(f"{prop}: {val}")
+    return "; ".join(kept)
+
+
+def _safe_url(value):
+    value = value.strip()
+    scheme = urlsplit(value).scheme.lower()
+    return value if scheme in ALLOWED_SCHEMES else None
+
+
+class _Sanitizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def _attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES["*"] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES:
+                value = _safe_url(value)
+            elif name == "style":
+                value = _clean_style(value)
+            if value:
+                cleaned.append(f' {name}="{escape(value)}"')
+
+        if tag == "a" and ("target", "_blank") in attrs:
+            cleaned.append(' rel="noopener noreferrer"')
+        return "".join(cleaned)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        self.out.append(f"<{tag}{self._attrs(tag, attrs)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+
+        # close anything left open inside this element
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(escape(data))
+
+    def result(self):
+        self.close()
+        self.out.extend(f"</{tag}>" for tag in reversed(self.open_tags))
+        self.open_tags = []
+        return "".join(self.out)
+
+
+def sanitize_html(content):
+    sanitizer = _Sanitizer()
+    sanitizer.feed(content or "")
+    return sanitizer.result()
+
+
+# =========================
+# PIPELINE
+# =========================
+def render_content(content):
+    text = html_to_text(content)
+    excerpt = Truncator(text).words(EXCERPT_WORDS)
+    return RenderedContent(
+        html=sanitize_html(content),
+        excerpt=Truncator(excerpt).chars(EXCERPT_MAX_LENGTH),
+        word_count=len(text.split()),
+    )
@@ -0,0 +1,13 @@
+from .notifications import unread_count
+
+
+def notifications(request):
+    user = getattr(request, "user", None)
+
+    # resolved by the template only when it is actually printed
+    def unread_notifications_count():
+        if user is None or not user.is_authenticated:
+            return 0
+        return unread_count(user)
+
+    return {"unread_notifications_count": unread_notifications_count}
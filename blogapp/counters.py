@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
+
+from .models import AuthorStats, Comment, Post
+
+
+Like = Post.likes.through
+
+
+# =========================
+# ATOMIC ADJUSTMENTS
+# =========================
+# update() skips auto_now; the counts are on the page, so they move
+# updated_at (and with it Last-Modified) too
+def adjust_like_count(post_ids, delta):
+    if post_ids and delta:
+        Post.objects.filter(pk__in=post_ids).update(
+            like_count=Greatest(F("like_count") + delta, 0),
+            updated_at=Now(),
+        )
+
+
+def adjust_comment_count(post_id, delta):
+    if delta:
+        Post.objects.filter(pk=post_id).update(
+            comment_count=Greatest(F("comment_count") + delta, 0),
+            updated_at=Now(),
+        )
+
+
+def adjust_author_stats(post_ids, **deltas):
+    """
+    Add per-post ``deltas`` (total_likes=1, total_views=n, ...) to the
+    stats of the posts' authors in one UPDATE; an author with several of
+    the posts gets the delta once per post. Without deltas it only moves
+    updated_at. Authors without a stats row are skipped: get_stats()
+    computes theirs from scratch.
+    """
+    if not post_ids:
+        return
+    posts = Post.objects.filter(pk__in=post_ids)
+    per_author = Subquery(
+        posts.filter(author_id=OuterRef("user_id"))
+        .order_by()
+        .values("author_id")
+        .annotate(n=Count("*"))
+        .values("n"),
+        output_field=IntegerField(),
+    )
+    AuthorStats.objects.filter(user_id__in=posts.values("author_id")).update(
+        **{
+            field: Greatest(F(field) + delta * per_author, 0)
+            for field, delta in deltas.items()
+            if delta
+        },
+        updated_at=Now(),
+    )
+
+
+def remove_from_author_stats(post):
+    # the post row is gone by now, so its author and numbers come from the instance
+    AuthorStats.objects.filter(user_id=post.author_id).update(
+        post_count=Greatest(F("post_count") - 1, 0),
+        total_views=Greatest(F("total_views") - post.views, 0),
+        total_likes=Greatest(F("total_likes") - post.like_count, 0),
+        updated_at=Now(),
+    )
+
+
+def pending_unlikes(instance, reverse, pk_set=None):
+    """
+    Work out which like rows a remove()/clear() is about to delete, as a
+    list of (post_ids, delta) pairs. Django passes the requested ids rather
+    than the ones that actually exist, so this has to run on pre_remove.
+    """
+    if reverse:
+        rows = Like.objects.filter(user_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(post_id__in=pk_set)
+        post_ids = list(rows.values_list("post_id", flat=True))
+        return [(post_ids, -1)]
+
+    rows = Like.objects.filter(post_id=instance.pk)
+    if pk_set is not None:
+        rows = rows.filter(user_id__in=pk_set)
+    return [([instance.pk], -rows.count())]
+
+
+# =========================
+# RECONCILIATION
+# =========================
+def count_subquery(related_qs):
+    counted = (
+        related_qs.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def drifted_posts():
+    return (
+        Post.objects
+        .annotate(
+            actual_likes=count_subquery(Like.objects.all()),
+            actual_comments=count_subquery(Comment.objects.all()),
+        )
+        .exclude(
+            like_count=F("actual_likes"),
+            comment_count=F("actual_comments"),
+        )
+    )
+
+
+def author_totals(user_ids=None):
+    """post_count, total_views and total_likes summed over the posts, per author."""
+    posts = Post.objects.order_by()
+    if user_ids is not None:
+        posts = posts.filter(author_id__in=user_ids)
+    return {
+        row.pop("author_id"): row
+        for row in posts.values("author_id").annotate(
+            post_count=Count("id"),
+            total_views=Coalesce(Sum("views"), 0),
+            total_likes=Coalesce(Sum("like_count"), 0),
+        )
+    }
+
+
+def reconcile_author_stats(batch_size=500, dry_run=False):
+    """Recompute AuthorStats from Post; returns how many rows had drifted."""
+    empty = {"post_count": 0, "total_views": 0, "total_likes": 0}
+    totals = author_totals()
+    now = timezone.now()
+    fixed = []
+    for stats in AuthorStats.objects.iterator(chunk_size=batch_size):
+        actual = totals.get(stats.user_id, empty)
+        if any(getattr(stats, field) != value for field, value in actual.items()):
+            for field, value in actual.items():
+                setattr(stats, field, value)
+            stats.updated_at = now
+            fixed.append(stats)
+
+    if not dry_run:
+        with transaction.atomic():
+            AuthorStats.objects.bulk_update(
+                fixed,
+                ["post_count", "total_views", "total_likes", "updated_at"],
+                batch_size=batch_size,
+            )
+
+    return len(fixed)
+
+
+def reconcile_counters(batch_size=500, dry_run=False):
+    rows = drifted_posts().values_list("pk", "actual_likes", "actual_comments")
+    fixed = [
+        Post(pk=pk, like_count=likes, comment_count=comments)
+        for pk, likes, comments in rows.iterator(chunk_size=batch_size)
+    ]
+
+    if not dry_run:
+        with transaction.atomic():
+            Post.objects.bulk_update(
+                fixed,
+                ["like_count", "comment_count"],
+                batch_size=batch_size,
+            )
+
+    return len(fixed)
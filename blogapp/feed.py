@@ -0,0 +1,86 @@
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from . import usercards
+from .models import Post
+
+
+PAGE_SIZE = 20
+
+FeedPage = namedtuple("FeedPage", ["posts", "next_cursor", "has_more"])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# =========================
+# CURSOR TOKENS
+# =========================
+def encode_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+
+
+# =========================
+# FEED PAGES
+# =========================
+def feed_queryset(viewer=None, queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+
+    return (
+        queryset
+        .for_viewer(viewer)
+        .for_list()
+        .prefetch_related("image_variants")
+    )
+
+
+def _page_queryset(viewer, cursor, page_size, queryset):
+    posts = feed_queryset(viewer, queryset)
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        posts = posts.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    # one extra row tells whether there is a next page
+    return posts.order_by("-created_at", "-pk")[:page_size + 1]
+
+
+def _feed_page(posts, page_size):
+    has_more = len(posts) > page_size
+    posts = usercards.attach(posts[:page_size])
+
+    next_cursor = encode_cursor(posts[-1]) if has_more else None
+    return FeedPage(posts, next_cursor, has_more)
+
+
+def get_feed_page(viewer=None, cursor=None, page_size=PAGE_SIZE, queryset=None):
+    """
+    One page of posts, newest first, keyed on (created_at, id) so the cost
+    of a page does not depend on how deep into the feed the reader is.
+    """
+    posts = list(_page_queryset(viewer, cursor, page_size, queryset))
+    return _feed_page(posts, page_size)
+
+
+async def aget_feed_page(viewer=None, cursor=None, page_size=PAGE_SIZE, queryset=None):
+    posts = [post async for post in _page_queryset(viewer, cursor, page_size, queryset)]
+    # author cards may need a query for cache misses
+    return await sync_to_async(_feed_page)(posts, page_size)
@@ -0,0 +1,80 @@
+"""
+Versioned template fragment caching for posts.
+
+Templates cache a post's markup with ``{% cache ... post.id post.cache_version
+using="fragments" %}``. Every post has a version token in the fragments
+cache; signals replace it whenever the post, its comments or its likes
+change, so older fragments are simply never looked up again. The tokens
+only reach every worker because settings require the fragments cache to be
+shared between processes.
+"""
+import time
+from itertools import count
+
+from django.core.cache import caches
+
+
+_sequence = count()
+
+
+def _cache():
+    return caches["fragments"]
+
+
+def _key(post_id):
+    return f"post-version:{post_id}"
+
+
+def _new_version():
+    # unique per call, also across restarts, so an evicted version can
+    # never be re-issued and match a stale fragment
+    return f"{time.time_ns():x}.{next(_sequence)}"
+
+
+def get_versions(post_ids):
+    cache = _cache()
+    keys = {_key(post_id): post_id for post_id in post_ids}
+    found = cache.get_many(list(keys))
+
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+
+    return {post_id: found[key] for key, post_id in keys.items()}
+
+
+def attach_versions(posts):
+    versions = get_versions([post.pk for post in posts])
+    for post in posts:
+        post.cache_version = versions[post.pk]
+    return posts
+
+
+def bump(post_ids):
+    if post_ids:
+        _cache().set_many(
+            {_key(post_id): _new_version() for post_id in post_ids},
+            timeout=None,
+        )
+
+
+# =========================
+# NAMED VERSIONS
+# =========================
+def _named_key(name):
+    return f"version:{name}"
+
+
+def get_version(name):
+    """A version token for something other than a post, e.g. the search index."""
+    cache = _cache()
+    version = cache.get(_named_key(name))
+    if version is None:
+        version = _new_version()
+        cache.set(_named_key(name), version, timeout=None)
+    return version
+
+
+def bump_version(name):
+    _cache().set(_named_key(name), _new_version(), timeout=None)
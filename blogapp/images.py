@@ -0,0 +1,228 @@
+"""
+Responsive derivatives for post images.
+
+Uploads are resized once with Pillow into a few WebP and JPEG widths, and
+the original dimensions plus a tiny blurred placeholder are stored on the
+post. Templates build ``<picture>``/``srcset`` markup from those rows (see
+templatetags/blog_tags.py) so cards never download the original upload.
+
+Views do none of this themselves: queue_upload() parks the upload in the
+local "image_staging" storage and the job worker moves it to media storage
+and builds the variants. The post is visible straight away with
+image_status "pending".
+"""
+import base64
+import os
+from io import BytesIO
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+from . import jobs
+from .models import Post, PostImageVariant
+
+
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+VARIANT_FORMATS = {
+    # format: (Pillow encoder, save options)
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+PLACEHOLDER_WIDTH = 16
+
+IMAGE_FIELDS = ["image_width", "image_height", "image_placeholder", "image_status"]
+
+STAGING_STORAGE = "image_staging"
+
+
+class ImageProcessingError(Exception):
+    pass
+
+
+# =========================
+# PILLOW HELPERS
+# =========================
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def _flatten(image):
+    # JPEG has no alpha channel, composite transparent uploads onto white
+    if _has_alpha(image):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _open(field_file):
+    try:
+        with field_file.open("rb") as fh:
+            image = Image.open(fh)
+            # phone photos carry their rotation in EXIF only
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise ImageProcessingError(f"Cannot read {field_file.name}: {exc}") from exc
+    return image
+
+
+def _encode(image, fmt):
+    encoder, options = VARIANT_FORMATS[fmt]
+    buffer = BytesIO()
+    image.save(buffer, format=encoder, **options)
+    return buffer.getvalue()
+
+
+def _resize(image, width):
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def variant_widths(original_width):
+    # never upscale, and top out at the original (or the largest tier)
+    largest = min(original_width, VARIANT_WIDTHS[-1])
+    return [w for w in VARIANT_WIDTHS if w < largest] + [largest]
+
+
+def placeholder(image):
+    small = _resize(_flatten(image), PLACEHOLDER_WIDTH)
+    small = small.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    small.save(buffer, format="JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+# =========================
+# POST IMAGES
+# =========================
+def _delete_variants(post):
+    for variant in post.image_variants.all():
+        variant.file.delete(save=False)
+    post.image_variants.all().delete()
+
+
+def generate_post_variants(post):
+    """
+    (Re)build the derivatives of ``post.image`` and store the original
+    dimensions and placeholder on the post. Clears them when the post no
+    longer has an image.
+    """
+    if not post.image:
+        _delete_variants(post)
+        post.image_width = post.image_height = None
+        post.image_placeholder = ""
+        post.image_status = "ready"
+        post.save(update_fields=IMAGE_FIELDS)
+        return []
+
+    original = _open(post.image)
+    sources = {
+        "webp": original.convert("RGBA") if _has_alpha(original) else _flatten(original),
+        "jpeg": _flatten(original),
+    }
+
+    variants = []
+    for width in variant_widths(original.width):
+        for fmt, source in sources.items():
+            resized = _resize(source, width)
+            variant = PostImageVariant(
+                post=post,
+                format=fmt,
+                width=resized.width,
+                height=resized.height,
+            )
+            variant.file.save(
+                f"{post.pk}-{width}.{fmt}",
+                ContentFile(_encode(resized, fmt)),
+                save=False,
+            )
+            variants.append(variant)
+
+    with transaction.atomic():
+        _delete_variants(post)
+        PostImageVariant.objects.bulk_create(variants)
+        post.image_width, post.image_height = original.size
+        post.image_placeholder = placeholder(original)
+        post.image_status = "ready"
+        # post_save bumps the fragment version so cached cards pick this up
+        post.save(update_fields=IMAGE_FIELDS)
+
+    return variants
+
+
+# =========================
+# UPLOAD QUEUE
+# =========================
+def _staging():
+    return storages[STAGING_STORAGE]
+
+
+def queue_upload(post, upload):
+    """
+    Stage an uploaded image for a saved post and hand it to the worker.
+    Whatever image the post had keeps being shown until the job is done.
+    """
+    staged = _staging().save(f"{post.pk}/{os.path.basename(upload.name)}", upload)
+    post.image_status = "pending"
+    post.save(update_fields=["image_status"])
+    jobs.enqueue("post_image", {"post_id": post.pk, "staged": staged})
+
+
+def queue_variants(post):
+    """Rebuild (or, for a removed image, delete) variants in the background."""
+    jobs.enqueue("post_image", {"post_id": post.pk})
+
+
+def _upload_failed(post_id, staged=None):
+    Post.objects.filter(pk=post_id).update(image_status="failed")
+    if staged:
+        _staging().delete(staged)
+
+
+@jobs.handler("post_image", on_failure=_upload_failed)
+def store_post_image(post_id, staged=None):
+    post = Post.objects.defer("content", "content_html").filter(pk=post_id).first()
+    staging = _staging()
+    if post is None:
+        if staged:
+            staging.delete(staged)
+        return
+
+    # a retry after the upload went through finds the staged file gone
+    if staged and staging.exists(staged):
+        with staging.open(staged) as fh:
+            post.image.save(os.path.basename(staged), File(fh), save=False)
+        post.save(update_fields=["image"])
+        staging.delete(staged)
+
+    generate_post_variants(post)
+
+
+# =========================
+# PROFILE PICTURES
+# =========================
+def avatar_url(picture, size):
+    """
+    Profile pictures live on Cloudinary, which resizes on the fly: ask for
+    a square crop at the displayed size in the best format the browser takes.
+    """
+    if not picture:
+        return ""
+    if not hasattr(picture, "build_url"):
+        return str(picture)
+    return picture.build_url(
+        width=size,
+        height=size,
+        crop="fill",
+        gravity="face",
+        fetch_format="auto",
+        quality="auto",
+        secure=True,
+    )
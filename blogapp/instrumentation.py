@@ -0,0 +1,231 @@
+"""
+Per-request performance instrumentation.
+
+QueryInstrumentationMiddleware wraps every database connection for the
+duration of a request and records how many queries ran, how long they took
+and which statements repeated (the same SQL shape run several times is
+usually an N+1). Template rendering time is measured around the template
+backend's render(); it includes queries evaluated lazily from templates.
+
+The numbers go out as a ``Server-Timing`` header, one JSON log line on the
+"blogapp.instrumentation" logger and ``response.request_metrics``. The log
+line is DEBUG (set BLOGAPP_LOG_LEVEL=DEBUG to see every request), or INFO
+for a request over its budget. Views listed in settings.QUERY_BUDGETS that
+run more queries than allowed are also logged as warnings, or raise
+QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (see blogapp.testing).
+"""
+import functools
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_metrics", default=None)
+
+DUPLICATES_REPORTED = 5
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# =========================
+# FINGERPRINTS
+# =========================
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """The shape of a statement: parameters, literals and IN lists folded."""
+    sql = _IN_LIST.sub("(...)", sql)
+    sql = _LITERAL.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+# =========================
+# METRICS
+# =========================
+class RequestMetrics:
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, limit=DUPLICATES_REPORTED):
+        return [
+            (sql, count)
+            for sql, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"total;dur={self.total_time * 1000:.1f}",
+        ])
+
+
+def current_metrics():
+    return _current.get()
+
+
+# =========================
+# TEMPLATE TIMING
+# =========================
+def _install_template_timer():
+    # only the backend Template is wrapped, so {% include %}s are not
+    # counted twice
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "instrumented", False):
+        return
+    original = Template.render
+
+    @functools.wraps(original)
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+    render.instrumented = True
+    Template.render = render
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+def _wrap_connections(stack, metrics):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _install_template_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            # the async ORM runs queries on a worker thread, which has
+            # connections of its own: wrap those
+            stack = ExitStack()
+            await sync_to_async(_wrap_connections)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        metrics.total_time = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match else None
+
+        response["Server-Timing"] = metrics.server_timing()
+        response.request_metrics = metrics
+        self.log(request, response, url_name, metrics)
+        self.check_budget(request, url_name, metrics)
+        return response
+
+    def log(self, request, response, url_name, metrics):
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        over_budget = budget is not None and metrics.queries > budget
+        level = logging.INFO if over_budget else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "view": url_name,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "template_ms": round(metrics.template_time * 1000, 1),
+            "total_ms": round(metrics.total_time * 1000, 1),
+            "duplicates": [
+                {"sql": sql[:300], "count": count}
+                for sql, count in metrics.duplicates()
+            ],
+        }))
+
+    def check_budget(self, request, url_name, metrics):
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        if budget is None or metrics.queries <= budget:
+            return
+
+        message = (
+            f"{request.method} {request.path} ({url_name}) ran "
+            f"{metrics.queries} queries, budget is {budget}"
+        )
+        duplicates = metrics.duplicates()
+        if duplicates:
+            message += "; repeated: " + "; ".join(
+                f"{count}x {sql[:200]}" for sql, count in duplicates
+            )
+
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
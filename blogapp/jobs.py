@@ -0,0 +1,138 @@
+"""
+A small database-backed job queue.
+
+Work that should not hold up a request (storing uploads, resizing images,
+the rollup and notification of a like) is written to the Job table with
+enqueue() and picked up by ``manage.py run_jobs``. Workers claim a job
+with a conditional UPDATE, so several of them can poll the same table
+without a broker or row locks. Failed jobs are retried with exponential
+backoff up to max_attempts.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# a worker that died mid-job leaves it "running"; hand it out again after this
+LOCK_TIMEOUT = timedelta(minutes=10)
+RETRY_DELAY = timedelta(seconds=15)
+
+HANDLERS = {}
+
+
+class UnknownJob(LookupError):
+    pass
+
+
+def handler(kind, on_failure=None):
+    """
+    Register the function that runs jobs of ``kind``; it is called with the
+    payload as keyword arguments. ``on_failure`` gets the same arguments once
+    the last attempt has failed.
+    """
+    def register(func):
+        HANDLERS[kind] = (func, on_failure)
+        return func
+    return register
+
+
+# =========================
+# PRODUCING
+# =========================
+def enqueue(kind, payload=None, delay=None, max_attempts=3):
+    if kind not in HANDLERS:
+        raise UnknownJob(kind)
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        run_after=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts,
+    )
+
+
+# =========================
+# CONSUMING
+# =========================
+def _runnable(now):
+    return Job.objects.filter(
+        Q(status="queued", run_after__lte=now)
+        | Q(status="running", locked_at__lt=now - LOCK_TIMEOUT)
+    )
+
+
+def claim(limit=10):
+    """Claim up to ``limit`` due jobs for this process, oldest first."""
+    now = timezone.now()
+    candidates = _runnable(now).order_by("run_after", "pk").values_list(
+        "pk", "status", "locked_at"
+    )[:limit]
+
+    claimed = []
+    for pk, status, locked_at in candidates:
+        # only wins if no other worker changed the row since we read it
+        won = Job.objects.filter(pk=pk, status=status, locked_at=locked_at).update(
+            status="running",
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if won:
+            claimed.append(pk)
+
+    return list(Job.objects.filter(pk__in=claimed).order_by("run_after", "pk"))
+
+
+def _finish(job, **fields):
+    fields.setdefault("locked_at", None)
+    # guard on locked_at: a job reclaimed after LOCK_TIMEOUT belongs to
+    # the other worker now
+    Job.objects.filter(pk=job.pk, locked_at=job.locked_at).update(**fields)
+
+
+def run_job(job):
+    func, on_failure = HANDLERS.get(job.kind, (None, None))
+    try:
+        if func is None:
+            raise UnknownJob(job.kind)
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s failed for good:\n%s", job, error)
+            _finish(job, status="failed", last_error=error, finished_at=timezone.now())
+            if on_failure is not None:
+                on_failure(**job.payload)
+        else:
+            logger.warning("Job %s failed, will retry:\n%s", job, error)
+            delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+            _finish(
+                job,
+                status="queued",
+                last_error=error,
+                run_after=timezone.now() + delay,
+            )
+        return False
+
+    _finish(job, status="done", last_error="", finished_at=timezone.now())
+    return True
+
+
+def run_pending(limit=10):
+    """Run one batch of due jobs; returns how many were processed."""
+    jobs = claim(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def purge_finished(older_than=timedelta(days=7)):
+    return Job.objects.filter(
+        status="done",
+        finished_at__lt=timezone.now() - older_than,
+    ).delete()[0]
@@ -0,0 +1,202 @@
+"""
+Like service.
+
+Membership checks and writes go straight to the likes through table, which
+is unique on (post_id, user_id), so each one is a single indexed query no
+matter how many people liked the post. Writes insert with ON CONFLICT DO
+NOTHING and delete with RETURNING, so the database reports the rows that
+really changed: like_count moves by exactly that many with an F()
+update, and set_liked() stays idempotent, without locking the post.
+
+Only the counters change inside the request. The daily rollup and the
+author's notification are written by a "like_fan_out" job (see jobs).
+Other writers (the admin, ``post.likes.add()``) go through the
+m2m_changed signals, which hand their changes to record().
+"""
+from collections import defaultdict, namedtuple
+from datetime import date
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import analytics, counters, fragments, jobs, notifications, pubsub
+from .models import Post
+
+
+Like = Post.likes.through
+
+MAX_BATCH = 100
+
+LikeState = namedtuple("LikeState", ["liked", "likes_count"])
+
+
+class UnknownPost(LookupError):
+    pass
+
+
+# =========================
+# QUERIES
+# =========================
+def is_liked(user, post_id):
+    return Like.objects.filter(post_id=post_id, user_id=user.pk).exists()
+
+
+def liked_post_ids(user, post_ids):
+    return set(
+        Like.objects
+        .filter(user_id=user.pk, post_id__in=post_ids)
+        .values_list("post_id", flat=True)
+    )
+
+
+def get_states(user, post_ids):
+    """{post_id: LikeState} for the posts that exist, in two queries."""
+    counts = dict(
+        Post.objects.filter(pk__in=post_ids).values_list("pk", "like_count")
+    )
+    liked = liked_post_ids(user, list(counts))
+    return {
+        post_id: LikeState(post_id in liked, count)
+        for post_id, count in counts.items()
+    }
+
+
+# =========================
+# SIDE EFFECTS
+# =========================
+def record(counts, added=()):
+    """
+    Apply what changed like rows imply: ``counts`` maps post ids to how
+    many likes they gained (or lost), ``added`` lists the (post_id, user_id)
+    pairs of new likes. Counters move in the caller's transaction; the
+    rollup and notifications are queued.
+    """
+    counts = {post_id: delta for post_id, delta in counts.items() if delta}
+    if not counts:
+        return
+
+    by_delta = defaultdict(list)
+    for post_id, delta in counts.items():
+        by_delta[delta].append(post_id)
+    for delta, post_ids in by_delta.items():
+        counters.adjust_like_count(post_ids, delta)
+        counters.adjust_author_stats(post_ids, total_likes=delta)
+
+    fragments.bump(list(counts))
+    pubsub.post_changed(list(counts))
+    jobs.enqueue("like_fan_out", {
+        "day": timezone.localdate().isoformat(),
+        "counts": [[post_id, delta] for post_id, delta in counts.items()],
+        "added": [list(pair) for pair in added],
+    })
+
+
+@jobs.handler("like_fan_out")
+def fan_out(day, counts, added):
+    with transaction.atomic():
+        analytics.add("likes", dict(counts), day=date.fromisoformat(day))
+        if added:
+            authors = dict(
+                Post.objects
+                .filter(pk__in={post_id for post_id, _ in added})
+                .values_list("pk", "author_id")
+            )
+            notifications.notify([
+                notifications.Event(authors.get(post_id), user_id, post_id, "like")
+                for post_id, user_id in added
+            ])
+
+
+# =========================
+# WRITES
+# =========================
+def _connection():
+    return connections[router.db_for_write(Like)]
+
+
+def _insert(user, post_ids):
+    """Like the posts that exist and aren't liked yet; returns their ids."""
+    table = Like._meta.db_table
+    with _connection().cursor() as cursor:
+        # the SELECT skips unknown posts; the WHERE also keeps SQLite
+        # from reading ON CONFLICT as a join constraint
+        cursor.execute(
+            f"INSERT INTO {table} (post_id, user_id) "
+            f"SELECT id, %s FROM {Post._meta.db_table} "
+            f"WHERE id IN ({', '.join(['%s'] * len(post_ids))}) "
+            f"ON CONFLICT DO NOTHING RETURNING post_id",
+            [user.pk, *post_ids],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _delete(user, post_ids):
+    """Unlike the posts; returns the ids of the likes that were there."""
+    table = Like._meta.db_table
+    with _connection().cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE user_id = %s "
+            f"AND post_id IN ({', '.join(['%s'] * len(post_ids))}) "
+            f"RETURNING post_id",
+            [user.pk, *post_ids],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _write(user, to_like, to_unlike):
+    liked = _insert(user, to_like) if to_like else []
+    unliked = _delete(user, to_unlike) if to_unlike else []
+    counts = dict.fromkeys(liked, 1)
+    counts.update(dict.fromkeys(unliked, -1))
+    record(counts, [(post_id, user.pk) for post_id in liked])
+
+
+def _post_id(post_id):
+    try:
+        return int(post_id)
+    except (ValueError, TypeError):
+        raise UnknownPost(post_id)
+
+
+def _state(post_id, liked):
+    count = Post.objects.filter(pk=post_id).values_list("like_count", flat=True).first()
+    if count is None:
+        raise UnknownPost(post_id)
+    return LikeState(liked, count)
+
+
+def set_liked(user, post_id, liked):
+    post_id = _post_id(post_id)
+    with transaction.atomic(using=router.db_for_write(Like)):
+        if liked:
+            _write(user, [post_id], [])
+        else:
+            _write(user, [], [post_id])
+        return _state(post_id, liked)
+
+
+def toggle(user, post_id):
+    post_id = _post_id(post_id)
+    with transaction.atomic(using=router.db_for_write(Like)):
+        # unlike if there was a like, otherwise like: no separate check
+        # that a concurrent toggle could invalidate
+        unliked = _delete(user, [post_id])
+        if unliked:
+            record({post_id: -1})
+        else:
+            _write(user, [post_id], [])
+        return _state(post_id, not unliked)
+
+
+def apply_batch(user, changes):
+    """
+    Apply {post_id: liked} for many posts with one insert and one delete,
+    then return the resulting states. Unknown post ids are ignored.
+    """
+    with transaction.atomic(using=router.db_for_write(Like)):
+        _write(
+            user,
+            [pk for pk, liked in changes.items() if liked],
+            [pk for pk, liked in changes.items() if not liked],
+        )
+    return get_states(user, list(changes))
@@ -0,0 +1,52 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from blogapp import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect static files, minifying this app's CSS/JS and writing "
+        "fingerprinted, gzip and brotli copies, then report their sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Remove the existing files in STATIC_ROOT first.",
+        )
+
+    def handle(self, *args, **options):
+        call_command(
+            "collectstatic",
+            interactive=False,
+            clear=options["clear"],
+            verbosity=max(options["verbosity"] - 1, 0),
+        )
+
+        self.stdout.write(
+            f"{'asset':<34}{'source':>9}{'min':>9}{'gzip':>9}{'brotli':>9}  served as"
+        )
+        for name in sorted(staticfiles_storage.hashed_files):
+            if assets.minifier(name) is None:
+                continue
+            hashed = staticfiles_storage.stored_name(name)
+            path = staticfiles_storage.path(hashed)
+            with open(path, "rb") as fh:
+                minified = fh.read()
+            self.stdout.write(
+                f"{name:<34}{os.path.getsize(finders.find(name)):>9}{len(minified):>9}"
+                f"{self._size(path + '.gz'):>9}"
+                f"{self._size(path + '.br'):>9}  {hashed}"
+            )
+
+    def _size(self, path):
+        # WhiteNoise skips a compressed copy that would not be smaller
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        return "-"
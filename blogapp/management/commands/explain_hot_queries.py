@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogapp import queryplans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot lookups and flag sequential scans and sorts that "
+        "an index should serve. Exits non-zero when any plan is flagged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Explain only this query (repeatable).",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print every plan, not just the flagged ones.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            plans = queryplans.check(only=options["only"])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        flagged = 0
+        for plan in plans:
+            if plan.problems:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"{plan.name}: {', '.join(plan.problems)}"))
+            else:
+                self.stdout.write(f"{plan.name}: ok")
+            if plan.problems or options["verbose_plans"]:
+                for line in plan.lines:
+                    self.stdout.write(f"    {line}")
+
+        if flagged:
+            raise CommandError(f"{flagged} of {len(plans)} hot queries need an index.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(plans)} hot queries use an index."))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blogapp import viewcounts
+
+
+class Command(BaseCommand):
+    help = "Write buffered post views back to Post.views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep flushing every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.VIEW_COUNTER_FLUSH_INTERVAL,
+        )
+
+    def handle(self, *args, **options):
+        if settings.VIEW_COUNTER_BACKEND != "cache":
+            self.stderr.write(
+                "VIEW_COUNTER_BACKEND is not 'cache'; web workers flush "
+                "their own buffers and there is nothing to drain from here."
+            )
+
+        while True:
+            flushed = viewcounts.flush()
+            if flushed or options["verbosity"] > 1:
+                self.stdout.write(f"Flushed {flushed} view(s).")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
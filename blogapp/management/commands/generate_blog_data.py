@@ -0,0 +1,230 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blogapp.content import render_content
+from blogapp.counters import reconcile_counters
+from blogapp.models import (
+    Comment,
+    Notification,
+    Post,
+    PostDailyStats,
+    Profile,
+)
+from blogapp.notifications import VERBS
+from blogapp.search import rebuild_index
+
+
+WORDS = (
+    "django python database query index cache latency feed post comment "
+    "reply like author profile search template render image worker queue "
+    "signal migration model view request response session server client "
+    "browser network travel nest world story idea design music coffee city "
+    "mountain river garden winter summer morning evening weekend family "
+    "friend project release deploy review bug fix feature notes journal"
+).split()
+
+# share of all comments at each reply depth, roots first
+COMMENT_DEPTHS = (0.55, 0.25, 0.12, 0.05, 0.03)
+
+BATCH_SIZE = 1000
+
+
+def zipf_cum_weights(n, skew):
+    """Cumulative weights where rank r is picked ~ 1 / r**skew."""
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(n)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, posts, nested comments, likes "
+        "and notifications for benchmarking. Popularity is Zipf-skewed: a few "
+        "authors write most posts and a few posts get most of the activity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument("--likes", type=int, default=40000)
+        parser.add_argument("--notifications", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=365, help="Spread content over this many days.")
+        parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for popularity.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="bench_", help="Username prefix for generated users.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.days = options["days"]
+        self.skew = options["skew"]
+
+        with transaction.atomic():
+            users = self.create_users(options["users"], options["prefix"])
+            posts = self.create_posts(options["posts"], users)
+            comments = self.create_comments(options["comments"], posts, users)
+            likes = self.create_likes(options["likes"], posts, users)
+            notifications = self.create_notifications(options["notifications"], posts, users)
+            stats = self.create_daily_stats(posts)
+
+        # bulk_create skips signals: derive counters and the search index
+        reconcile_counters()
+        rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {len(posts)} posts, {comments} comments, "
+            f"{likes} likes, {notifications} notifications, {stats} daily stats rows."
+        ))
+
+    # =========================
+    # HELPERS
+    # =========================
+    def sentence(self, low, high):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def body(self):
+        blocks = []
+        for _ in range(self.rng.randint(2, 8)):
+            if self.rng.random() < 0.2:
+                blocks.append(f"<h2>{self.sentence(2, 5).title()}</h2>")
+            words = self.sentence(30, 120).split()
+            words[self.rng.randrange(len(words))] = f"<b>{self.rng.choice(WORDS)}</b>"
+            blocks.append(f"<p>{' '.join(words)}</p>")
+        return "\n".join(blocks)
+
+    def moment_after(self, start):
+        span = max((self.now - start).total_seconds(), 1)
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    def backdate(self, objs, when):
+        # auto_now_add always wins in bulk_create, so rewrite afterwards
+        for obj in objs:
+            obj.created_at = when(obj)
+        type(objs[0]).objects.bulk_update(objs, ["created_at"], batch_size=BATCH_SIZE)
+
+    # =========================
+    # GENERATORS
+    # =========================
+    def create_users(self, count, prefix):
+        start = User.objects.filter(username__startswith=prefix).count()
+        password = make_password("benchmark")
+        users = User.objects.bulk_create(
+            [
+                User(username=f"{prefix}{start + i}", email=f"{prefix}{start + i}@example.com", password=password)
+                for i in range(count)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=BATCH_SIZE)
+        return users
+
+    def create_posts(self, count, users):
+        author_weights = zipf_cum_weights(len(users), self.skew)
+        posts = []
+        for author in self.rng.choices(users, cum_weights=author_weights, k=count):
+            post = Post(title=self.sentence(3, 8).capitalize(), content=self.body(), author=author)
+            rendered = render_content(post.content)
+            post.content_html, post.excerpt, post.word_count = rendered
+            post.views = int(self.rng.paretovariate(1.2) * 20)
+            posts.append(post)
+
+        posts = Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        start = self.now - timedelta(days=self.days)
+        self.backdate(posts, lambda post: self.moment_after(start))
+        # list position is the popularity rank; keep it independent of age
+        self.rng.shuffle(posts)
+        return posts
+
+    def create_comments(self, count, posts, users):
+        post_weights = zipf_cum_weights(len(posts), self.skew)
+        post_created = {post.pk: post.created_at for post in posts}
+        created = 0
+        parents = []
+        for depth, share in enumerate(COMMENT_DEPTHS):
+            n = int(count * share)
+            if depth == 0:
+                targets = [(post, None) for post in self.rng.choices(posts, cum_weights=post_weights, k=n)]
+            elif parents:
+                targets = [(None, parent) for parent in self.rng.choices(parents, k=n)]
+            else:
+                break
+
+            level = Comment.objects.bulk_create(
+                [
+                    Comment(
+                        post_id=post.pk if post else parent.post_id,
+                        parent=parent,
+                        user=self.rng.choice(users),
+                        content=self.sentence(4, 40),
+                    )
+                    for post, parent in targets
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            self.backdate(level, lambda c: self.moment_after(
+                c.parent.created_at if c.parent_id else post_created[c.post_id]
+            ))
+            created += len(level)
+            parents = level
+        return created
+
+    def create_likes(self, count, posts, users):
+        Like = Post.likes.through
+        post_weights = zipf_cum_weights(len(posts), self.skew)
+        pairs = {
+            (post.pk, self.rng.choice(users).pk)
+            for post in self.rng.choices(posts, cum_weights=post_weights, k=count)
+        }
+        Like.objects.bulk_create(
+            [Like(post_id=post_id, user_id=user_id) for post_id, user_id in pairs],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return len(pairs)
+
+    def create_notifications(self, count, posts, users):
+        post_weights = zipf_cum_weights(len(posts), self.skew)
+        kinds = list(VERBS)
+        notifications = []
+        for post in self.rng.choices(posts, cum_weights=post_weights, k=count):
+            sender = self.rng.choice(users)
+            kind = self.rng.choice(kinds)
+            actors = 1 if self.rng.random() < 0.7 else self.rng.randint(2, 40)
+            notifications.append(Notification(
+                user_id=post.author_id,
+                sender=sender,
+                post=post,
+                notification_type=kind,
+                actor_count=actors,
+                message=f"{sender.username} {VERBS[kind]}",
+                is_read=self.rng.random() < 0.7,
+            ))
+        notifications = Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        if notifications:
+            self.backdate(notifications, lambda n: self.moment_after(self.now - timedelta(days=30)))
+        return len(notifications)
+
+    def create_daily_stats(self, posts):
+        today = timezone.localdate()
+        rows = []
+        for rank, post in enumerate(posts):
+            age = min((today - post.created_at.date()).days, 90)
+            # popular posts have activity on most days, the long tail on few
+            active_days = max(1, int(age / (1 + rank / 50)))
+            for offset in self.rng.sample(range(age + 1), min(active_days, age + 1)):
+                rows.append(PostDailyStats(
+                    post_id=post.pk,
+                    author_id=post.author_id,
+                    date=today - timedelta(days=offset),
+                    views=int(self.rng.paretovariate(1.5) * 5),
+                    likes=self.rng.randint(0, 3),
+                    comments=self.rng.randint(0, 2),
+                ))
+        PostDailyStats.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(rows)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.images import ImageProcessingError, generate_post_variants
+from blogapp.models import Post
+
+
+class Command(BaseCommand):
+    help = "Build responsive WebP/JPEG variants for post images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild variants for every post with an image.",
+        )
+        parser.add_argument("--post", type=int, action="append", dest="post_ids")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(image__isnull=True)
+        if options["post_ids"]:
+            posts = posts.filter(pk__in=options["post_ids"])
+        if not options["force"]:
+            posts = posts.filter(image_variants__isnull=True)
+
+        done = failed = 0
+        for post in posts.defer("content", "content_html").iterator(chunk_size=100):
+            try:
+                variants = generate_post_variants(post)
+            except ImageProcessingError as exc:
+                failed += 1
+                self.stderr.write(f"post {post.pk}: {exc}")
+                continue
+            done += 1
+            self.stdout.write(f"post {post.pk}: {len(variants)} variant(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"{done} post(s) processed, {failed} failed."))
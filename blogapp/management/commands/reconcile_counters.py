@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.counters import reconcile_author_stats, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.like_count / Post.comment_count, then AuthorStats, "
+        "where they have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted posts without writing.",
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters(
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        # author totals are summed from the post counters fixed above
+        fixed_stats = reconcile_author_stats(
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "would be fixed" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{fixed} post counter(s) {verb}."))
+        self.stdout.write(self.style.SUCCESS(f"{fixed_stats} author stats row(s) {verb}."))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogapp import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot views through the test client: p50/p95 latency, "
+        "queries per request and peak memory, optionally against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Run only this scenario (repeatable).",
+        )
+        parser.add_argument("--baseline", help="Compare with this baseline JSON file.")
+        parser.add_argument("--save-baseline", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=benchmarks.DEFAULT_TOLERANCE,
+            help="Allowed p95 slowdown over the baseline, as a fraction.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmarks.run(
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                only=options["only"],
+            )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        baseline = {}
+        if options["baseline"]:
+            baseline = benchmarks.load_baseline(options["baseline"])
+
+        self.stdout.write(
+            f"{'scenario':<16}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'queries':>9}{'peak KB':>10}{'base p95':>10}"
+        )
+        for result in results:
+            before = baseline.get(result.name, {})
+            self.stdout.write(
+                f"{result.name:<16}{result.status:>7}{result.p50_ms:>10}{result.p95_ms:>10}"
+                f"{result.queries:>9}{result.peak_kb:>10}{before.get('p95_ms', '-'):>10}"
+            )
+
+        if options["save_baseline"]:
+            benchmarks.save_baseline(results, options["save_baseline"])
+            self.stdout.write(f"Baseline written to {options['save_baseline']}.")
+
+        if baseline:
+            regressions = benchmarks.compare(results, baseline, options["tolerance"])
+            for name, message in regressions:
+                self.stderr.write(f"REGRESSION {name}: {message}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against the baseline.")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
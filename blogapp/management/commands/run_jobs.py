@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blogapp import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (image uploads and resizing, like rollups and notifications)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new jobs every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=float, default=2.0)
+        parser.add_argument("--batch-size", type=int, default=10)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = jobs.run_pending(options["batch_size"])
+            if processed or options["verbosity"] > 1:
+                self.stdout.write(f"Processed {processed} job(s).")
+
+            if processed:
+                # more may be waiting, don't sleep between full batches
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogapp import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of the sync views and the async (ASGI) "
+        "views under concurrent clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=benchmarks.THROUGHPUT_SCENARIOS,
+            help="Run only this scenario (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmarks.run_throughput(
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                only=options["only"],
+            )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{'scenario':<16}{'mode':>7}{'clients':>9}{'requests':>10}"
+            f"{'errors':>8}{'req/s':>9}{'p95 ms':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.name:<16}{result.mode:>7}{result.concurrency:>9}{result.requests:>10}"
+                f"{result.errors:>8}{result.rps:>9}{result.p95_ms:>10}"
+            )
@@ -0,0 +1,84 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:40
+
+import html
+import re
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+BLOCK_TAG = re.compile(r'(?i)<(/?(?:p|div|br|li|h[1-6]|tr|td|th|blockquote|pre)\b)')
+
+
+def _text(content):
+    text = re.sub(r'(?is)<(script|style)\b.*?</\1\s*>', ' ', content or '')
+    text = html.unescape(strip_tags(BLOCK_TAG.sub(r' <\1', text)))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _rows(apps):
+    Post = apps.get_model('blogapp', 'Post')
+    for post in Post.objects.select_related('author').iterator(chunk_size=500):
+        yield post.pk, post.title, _text(post.content), post.author.username
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE blogapp_post_fts USING fts5("
+            "title, body, author, "
+            "tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO blogapp_post_fts (rowid, title, body, author) "
+                "VALUES (%s, %s, %s, %s)",
+                list(_rows(apps)),
+            )
+
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE blogapp_post_search ("
+            "post_id bigint PRIMARY KEY REFERENCES blogapp_post (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "body text NOT NULL DEFAULT '', "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX blogapp_post_search_document_idx "
+            "ON blogapp_post_search USING GIN (document)"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO blogapp_post_search (post_id, body, document) "
+                "VALUES (%s, %s, "
+                "setweight(to_tsvector('english', %s), 'A') "
+                "|| setweight(to_tsvector('simple', %s), 'B') "
+                "|| setweight(to_tsvector('english', %s), 'C'))",
+                [
+                    (pk, body, title, author, body)
+                    for pk, title, body, author in _rows(apps)
+                ],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS blogapp_post_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS blogapp_post_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0009_comment_post_parent_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
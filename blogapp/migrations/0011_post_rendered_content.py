@@ -0,0 +1,188 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:23
+
+import html
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator
+
+
+# a copy of blogapp.content as it stood when this migration was written,
+# so later changes to the sanitizer don't change what it does
+
+BLOCK_TAG = re.compile(r'(?i)<(/?(?:p|div|br|li|h[1-6]|tr|td|th|blockquote|pre)\b)')
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'caption', 'code', 'div', 'em',
+    'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i',
+    'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strike', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'style', 'class'},
+    'a': {'href', 'title', 'target'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'', 'http', 'https', 'mailto'}
+
+ALLOWED_STYLES = {
+    'text-align', 'color', 'background-color', 'font-weight', 'font-style',
+    'text-decoration', 'width', 'height', 'float', 'margin', 'margin-left',
+    'margin-right', 'border', 'border-width', 'border-style',
+}
+STYLE_VALUE = re.compile(r'^[#\w\s.,%()-]+$')
+
+
+def _text(content):
+    text = re.sub(r'(?is)<(script|style)\b.*?</\1\s*>', ' ', content or '')
+    text = html.unescape(strip_tags(BLOCK_TAG.sub(r' <\1', text)))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _clean_style(value):
+    kept = []
+    for declaration in value.split(';'):
+        prop, _, val = declaration.partition(':')
+        prop, val = prop.strip().lower(), val.strip()
+        if (
+            prop in ALLOWED_STYLES
+            and STYLE_VALUE.match(val)
+            and 'url' not in val.lower()
+            and 'expression' not in val.lower()
+        ):
+            kept.append(f'{prop}: {val}')
+    return '; '.join(kept)
+
+
+def _safe_url(value):
+    value = value.strip()
+    scheme = urlsplit(value).scheme.lower()
+    return value if scheme in ALLOWED_SCHEMES else None
+
+
+class _Sanitizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def _attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES:
+                value = _safe_url(value)
+            elif name == 'style':
+                value = _clean_style(value)
+            if value:
+                cleaned.append(f' {name}="{escape(value)}"')
+
+        if tag == 'a' and ('target', '_blank') in attrs:
+            cleaned.append(' rel="noopener noreferrer"')
+        return ''.join(cleaned)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        self.out.append(f'<{tag}{self._attrs(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(escape(data))
+
+    def result(self):
+        self.close()
+        self.out.extend(f'</{tag}>' for tag in reversed(self.open_tags))
+        self.open_tags = []
+        return ''.join(self.out)
+
+
+def _sanitize(content):
+    sanitizer = _Sanitizer()
+    sanitizer.feed(content or '')
+    return sanitizer.result()
+
+
+def render_existing_posts(apps, schema_editor):
+    Post = apps.get_model('blogapp', 'Post')
+
+    batch = []
+    for post in Post.objects.only('id', 'content').iterator(chunk_size=500):
+        text = _text(post.content)
+        post.content_html = _sanitize(post.content)
+        post.excerpt = Truncator(Truncator(text).words(30)).chars(400)
+        post.word_count = len(text.split())
+        batch.append(post)
+
+    Post.objects.bulk_update(
+        batch,
+        ['content_html', 'excerpt', 'word_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0010_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0015_post_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # search redirects on a case-insensitive username match; the
+        # expression index backs filter(username_upper=...) on both SQLite
+        # and PostgreSQL (iexact compiles to LIKE, which cannot use it)
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_username_upper_idx ON auth_user (UPPER(username))',
+            'DROP INDEX IF EXISTS auth_user_username_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_post_parent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_inbox_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'created_at'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='post_author_feed_idx'),
+        ),
+    ]
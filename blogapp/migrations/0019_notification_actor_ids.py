@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+def backfill_actor_ids(apps, schema_editor):
+    # only unread rows are ever merged into; earlier actors of a coalesced
+    # row were not recorded, so its latest sender is all that is known
+    Notification = apps.get_model('blogapp', 'Notification')
+    rows = list(Notification.objects.filter(is_read=False).only('pk', 'sender_id'))
+    for row in rows:
+        row.actor_ids = [row.sender_id]
+    Notification.objects.bulk_update(rows, ['actor_ids'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0018_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(backfill_actor_ids, migrations.RunPython.noop),
+    ]
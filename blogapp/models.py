@@ -49,26 +49,172 @@ class Category(models.Model):
 from django.conf import settings
 from django.db import models
 
+from .content import render_content
+
 User = settings.AUTH_USER_MODEL
 
+RENDERED_CONTENT_FIELDS = ("content_html", "excerpt", "word_count")
+
+
+class PostQuerySet(models.QuerySet):
+
+    def for_viewer(self, viewer):
+        """
+        ``is_liked`` for the viewer in the same SELECT; like_count and
+        comment_count are stored columns already. Author name and avatar
+        come from blogapp.usercards (``usercards.attach(posts)``), not a
+        join.
+        """
+        if viewer is not None and viewer.is_authenticated:
+            liked = Post.likes.through.objects.filter(
+                post_id=models.OuterRef("pk"),
+                user_id=viewer.pk,
+            )
+            return self.annotate(is_liked=models.Exists(liked))
+        return self.annotate(
+            is_liked=models.Value(False, output_field=models.BooleanField())
+        )
+
+    def for_list(self):
+        # list pages print the excerpt, never the body
+        return self.defer("content", "content_html")
+
 
 class Post(models.Model):
+    IMAGE_STATUSES = (
+        ('ready', 'Ready'),
+        ('pending', 'Processing'),
+        ('failed', 'Failed'),
+    )
+
     title = models.CharField(max_length=255)
     content = models.TextField()
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # filled in by blogapp.images alongside the resized variants
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+    # uploads are stored and resized by the job worker, see blogapp.jobs
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUSES,
+        default='ready',
+        editable=False,
+    )
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # any write to the row, counter updates included (see blogapp.counters)
+    updated_at = models.DateTimeField(auto_now=True)
     views = models.PositiveIntegerField(default=0)
     likes = models.ManyToManyField(User, related_name="liked_posts", blank=True)
 
+    # denormalized counters, kept in sync by blogapp.counters
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    # derived from content on save, see blogapp.content
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=400, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the feed, globally and per author
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_feed_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *RENDERED_CONTENT_FIELDS}
+        super().save(*args, **kwargs)
+
+    def render_content(self):
+        rendered = render_content(self.content)
+        self.content_html = rendered.html
+        self.excerpt = rendered.excerpt
+        self.word_count = rendered.word_count
+
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     def __str__(self):
         return self.title
 
 
 
+class PostDailyStats(models.Model):
+    """
+    Per-post, per-day activity, written by blogapp.analytics from the view
+    flush and the like/comment signals. likes and comments are net changes
+    (an unlike counts -1), so they can go negative on a given day.
+    """
+    post = models.ForeignKey(Post, related_name='daily_stats', on_delete=models.CASCADE)
+    # denormalized so author dashboards never join through Post
+    author = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='unique_post_day'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'date'], name='dailystats_author_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} {self.date}"
+
+
+class AuthorStats(models.Model):
+    """
+    The numbers on an author's profile, kept up to date by the write paths
+    (blogapp.counters) instead of being summed over their posts per page.
+    Created on first use by blogapp.authors.get_stats().
+    """
+    user = models.OneToOneField(User, related_name='author_stats', on_delete=models.CASCADE)
+    post_count = models.PositiveIntegerField(default=0)
+    total_views = models.PositiveIntegerField(default=0)
+    total_likes = models.PositiveIntegerField(default=0)
+    # moved by every change to the author's posts (see blogapp.conditional)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.post_count} posts"
+
+
+class PostImageVariant(models.Model):
+    FORMATS = (
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    )
+
+    post = models.ForeignKey(Post, related_name='image_variants', on_delete=models.CASCADE)
+    format = models.CharField(max_length=4, choices=FORMATS)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to='posts/variants/')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'format', 'width'],
+                name='unique_post_image_variant',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} {self.format} {self.width}w"
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -82,6 +228,19 @@ class Comment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # a post's whole thread is loaded in (created_at, id) order
+            models.Index(
+                fields=['post', 'created_at', 'id'],
+                name='comment_post_created_idx',
+            ),
+            # expanding a thread walks down from one comment by parent
+            models.Index(
+                fields=['parent', 'created_at'],
+                name='comment_parent_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.content[:30]
@@ -91,6 +250,7 @@ class Notification(models.Model):
     NOTIFICATION_TYPES = (
         ('like', 'Like'),
         ('comment', 'Comment'),
+        ('reply', 'Reply'),
     )
 
     user = models.ForeignKey(
@@ -114,9 +274,57 @@ class Notification(models.Model):
         choices=NOTIFICATION_TYPES
     )
     message = models.CharField(max_length=255)
+    # how many people a coalesced notification stands for
+    actor_count = models.PositiveIntegerField(default=1)
+    # their user ids; actor_count is len(actor_ids)
+    actor_ids = models.JSONField(default=list)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                name='notification_inbox_idx',
+            ),
+            # unread counts and coalescing only ever look at unread rows
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.message
-        
\ No newline at end of file
+        
+
+# ==============================
+# BACKGROUND JOBS
+# ==============================
+class Job(models.Model):
+    STATUSES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
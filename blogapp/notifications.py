@@ -0,0 +1,164 @@
+"""
+Notification fan-out.
+
+Likes and comments are turned into notifications by signal handlers. A burst
+of the same kind of activity on one post collapses into a single unread row
+("alice and 12 others liked your post") instead of one row per actor; new
+rows are written with bulk_create. Unread counts are cached per user in
+settings.NOTIFICATION_CACHE, which has to be shared between workers for
+the invalidation to reach them all.
+
+bulk_create and bulk_update send no post_save, so notify() sends its own
+``notified`` signal with the rows it wrote.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Notification
+
+
+# sent with rows=[...], the notifications created or merged
+notified = Signal()
+
+COALESCE_WINDOW = timedelta(hours=6)
+UNREAD_COUNT_TIMEOUT = 5 * 60
+
+Event = namedtuple("Event", ["recipient_id", "sender_id", "post_id", "kind"])
+
+VERBS = {
+    "like": "liked your post",
+    "comment": "commented on your post",
+    "reply": "replied to your comment",
+}
+
+
+def _message(sender_name, actor_count, kind):
+    if actor_count <= 1:
+        return f"{sender_name} {VERBS[kind]}"
+    others = actor_count - 1
+    return f"{sender_name} and {others} other{'s' if others > 1 else ''} {VERBS[kind]}"
+
+
+# =========================
+# UNREAD COUNT
+# =========================
+def _cache():
+    return caches[settings.NOTIFICATION_CACHE]
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user):
+    return _cache().get_or_set(
+        _unread_key(user.pk),
+        lambda: Notification.objects.filter(user=user, is_read=False).count(),
+        timeout=UNREAD_COUNT_TIMEOUT,
+    )
+
+
+def forget_unread_counts(user_ids):
+    _cache().delete_many([_unread_key(user_id) for user_id in set(user_ids)])
+
+
+def mark_read(user, notification_ids):
+    if notification_ids:
+        Notification.objects.filter(
+            user=user,
+            pk__in=notification_ids,
+            is_read=False,
+        ).update(is_read=True)
+        forget_unread_counts([user.pk])
+
+
+# =========================
+# FAN-OUT
+# =========================
+def notify(events):
+    """
+    Write notifications for a batch of events, merging them into unread
+    notifications of the same kind on the same post where possible.
+    """
+    events = [e for e in events if e.recipient_id and e.recipient_id != e.sender_id]
+    if not events:
+        return
+
+    # group per (recipient, post, kind), last sender wins the headline
+    groups = {}
+    for event in events:
+        group = groups.setdefault(
+            (event.recipient_id, event.post_id, event.kind),
+            {"sender_id": None, "senders": set()},
+        )
+        group["sender_id"] = event.sender_id
+        group["senders"].add(event.sender_id)
+
+    names = dict(
+        get_user_model().objects
+        .filter(pk__in={g["sender_id"] for g in groups.values()})
+        .values_list("pk", "username")
+    )
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            (n.user_id, n.post_id, n.notification_type): n
+            for n in Notification.objects.select_for_update().filter(
+                reduce(or_, (
+                    Q(user_id=user_id, post_id=post_id, notification_type=kind)
+                    for user_id, post_id, kind in groups
+                )),
+                is_read=False,
+                created_at__gte=now - COALESCE_WINDOW,
+            ).order_by("created_at")
+        }
+
+        merged, created = [], []
+        for key, group in groups.items():
+            user_id, post_id, kind = key
+            sender_id = group["sender_id"]
+            notification = existing.get(key)
+
+            if notification is not None:
+                # someone liking, unliking and liking again is still one actor
+                actor_ids = set(notification.actor_ids) | group["senders"]
+                notification.actor_ids = sorted(actor_ids)
+                notification.actor_count = len(actor_ids)
+                notification.sender_id = sender_id
+                notification.created_at = now
+                notification.message = _message(
+                    names.get(sender_id), notification.actor_count, kind
+                )
+                merged.append(notification)
+            else:
+                created.append(Notification(
+                    user_id=user_id,
+                    sender_id=sender_id,
+                    post_id=post_id,
+                    notification_type=kind,
+                    actor_count=len(group["senders"]),
+                    actor_ids=sorted(group["senders"]),
+                    message=_message(names.get(sender_id), len(group["senders"]), kind),
+                ))
+
+        if merged:
+            Notification.objects.bulk_update(
+                merged,
+                ["actor_count", "actor_ids", "sender", "created_at", "message"],
+            )
+        if created:
+            Notification.objects.bulk_create(created)
+
+    forget_unread_counts(user_id for user_id, _, _ in groups)
+    notified.send(sender=Notification, rows=merged + created)
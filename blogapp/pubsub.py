@@ -0,0 +1,159 @@
+"""
+Publish/subscribe for live page updates (see async_views.events).
+
+Signal handlers publish small messages once the surrounding transaction
+commits: ``{"type": "post", "id": ...}`` on "post:<id>" when a post's like
+or comment count moves, and the notification itself on "user:<id>". The
+SSE stream subscribes to the channels of the page it serves.
+
+A broker has two methods: ``publish(channel, message)``, callable from any
+thread, and ``subscribe(channels)``, called on the event loop, returning a
+Subscription. LocalBroker only reaches subscribers in the same process; a
+broker backed by Redis or Postgres LISTEN/NOTIFY can be added to BACKENDS
+to reach every worker.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+# messages a slow subscriber may fall behind before it is dropped
+QUEUE_SIZE = 100
+
+
+def post_channel(post_id):
+    return f"post:{post_id}"
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+# =========================
+# SUBSCRIPTIONS
+# =========================
+class Subscription:
+    """
+    Messages for one client, queued on the event loop that subscribed.
+    When the queue overflows the subscription is closed: the client
+    reconnects and starts again from a fresh snapshot.
+    """
+
+    def __init__(self, broker, channels, maxsize=QUEUE_SIZE):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        # called from whichever thread published
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # the loop is gone
+            self.close()
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Dropping a subscriber to %s that fell behind", sorted(self.channels))
+            # get() returns what is queued, then None
+            self.close()
+
+    async def get(self):
+        """The next message, or None once the subscription is closed."""
+        if self.closed and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# =========================
+# BROKERS
+# =========================
+class LocalBroker:
+    """Subscribers in this process only."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+BACKENDS = {
+    "local": LocalBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = BACKENDS[settings.PUBSUB_BACKEND]()
+    return _broker
+
+
+# =========================
+# PUBLISHING
+# =========================
+def publish(channel, message):
+    """Publish once the current transaction (if any) commits."""
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
+
+
+def post_changed(post_ids):
+    for post_id in set(post_ids):
+        publish(post_channel(post_id), {"type": "post", "id": post_id})
+
+
+def notification_changed(notifications):
+    for notification in notifications:
+        publish(user_channel(notification.user_id), {
+            "type": "notification",
+            "id": notification.pk,
+            "message": notification.message,
+            "created_at": notification.created_at.isoformat(),
+        })
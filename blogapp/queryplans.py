@@ -0,0 +1,133 @@
+"""
+EXPLAIN checks for the hot lookups.
+
+Each entry in build_queries() is the queryset a hot view or worker runs,
+built against real rows so the planner sees realistic parameters. check()
+runs EXPLAIN for each and flags full table scans and sorts the index
+should have made unnecessary. SQLite and PostgreSQL plans are understood;
+``manage.py explain_hot_queries`` is the command line front end.
+
+PostgreSQL happily seq-scans tiny tables, so run the check against a
+database filled by ``manage.py generate_blog_data``.
+"""
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from .feed import feed_queryset
+from .models import Comment, Job, Notification, Post, PostDailyStats
+
+
+HotQuery = namedtuple("HotQuery", ["name", "queryset"])
+Plan = namedtuple("Plan", ["name", "lines", "problems"])
+
+# full scans of tables that should be reached through an index
+_SQLITE_SCAN = re.compile(r"\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?!\w)")
+_SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_POSTGRES_SORT = re.compile(r"^\s*(?:->\s*)?Sort\b")
+
+# tables whose full scan is expected: FTS5 shadow tables and CTEs
+_SCAN_ALLOWED = re.compile(r"^(?:post_search\w*|\w*_cte)$")
+
+
+# =========================
+# HOT QUERIES
+# =========================
+def build_queries():
+    User = get_user_model()
+    author = (
+        User.objects
+        .annotate(n=Count("post"))
+        .order_by("-n", "pk")
+        .first()
+    )
+    post = Post.objects.order_by("-comment_count", "pk").first()
+    if author is None or post is None:
+        raise LookupError("No posts to explain; run manage.py generate_blog_data first.")
+
+    now = timezone.now()
+    today = timezone.localdate()
+    like = Post.likes.through
+
+    return [
+        HotQuery("feed_first_page", feed_queryset(author).order_by("-created_at", "-pk")[:21]),
+        HotQuery("feed_next_page", (
+            feed_queryset(author)
+            .filter(Q(created_at__lt=post.created_at) | Q(created_at=post.created_at, pk__lt=post.pk))
+            .order_by("-created_at", "-pk")[:21]
+        )),
+        HotQuery("author_posts", (
+            Post.objects.filter(author=author).for_viewer(author).for_list().order_by("-created_at")
+        )),
+        HotQuery("post_comments", Comment.objects.filter(post=post).order_by("created_at", "id")),
+        HotQuery("notification_inbox", (
+            Notification.objects.filter(user=author).order_by("-created_at", "-id")[:20]
+        )),
+        HotQuery("notification_unread_count", (
+            Notification.objects.filter(user=author, is_read=False).values("pk")
+        )),
+        HotQuery("notification_coalesce", (
+            Notification.objects.filter(
+                user=author,
+                post=post,
+                notification_type="like",
+                is_read=False,
+                created_at__gte=now - timedelta(hours=1),
+            ).order_by("created_at")
+        )),
+        HotQuery("username_lookup", (
+            User.objects.alias(username_upper=Upper("username"))
+            .filter(username_upper=Upper(Value(author.username)))
+        )),
+        HotQuery("liked_post_ids", (
+            like.objects.filter(user_id=author.pk, post_id__in=[post.pk]).values("post_id")
+        )),
+        HotQuery("dashboard_series", (
+            PostDailyStats.objects
+            .filter(author=author, date__range=(today - timedelta(days=29), today))
+            .values("date")
+        )),
+        HotQuery("job_claim", (
+            Job.objects.filter(status="queued", run_after__lte=now).order_by("run_after", "pk")[:10]
+        )),
+    ]
+
+
+# =========================
+# CHECKS
+# =========================
+def _problems(lines, vendor):
+    problems = []
+    for line in lines:
+        if vendor == "sqlite":
+            scan, sort = _SQLITE_SCAN.search(line), _SQLITE_SORT.search(line)
+        elif vendor == "postgresql":
+            scan, sort = _POSTGRES_SCAN.search(line), _POSTGRES_SORT.search(line)
+        else:
+            return problems
+
+        if scan and not _SCAN_ALLOWED.match(scan.group(1)):
+            problems.append(f"full scan of {scan.group(1)}")
+        if sort:
+            problems.append("sort not served by an index")
+    return problems
+
+
+def explain(hot_query):
+    lines = hot_query.queryset.explain().splitlines()
+    return Plan(hot_query.name, lines, _problems(lines, connection.vendor))
+
+
+def check(only=None):
+    return [
+        explain(hot_query)
+        for hot_query in build_queries()
+        if not only or hot_query.name in only
+    ]
@@ -0,0 +1,161 @@
+"""
+Database routers.
+
+ReplicaRouter sends the reads of views wrapped in ``replica_reads`` to one
+of settings.DATABASE_REPLICAS. Everything else, writes, and reads inside a
+transaction stay on the primary. After a client writes (any successful
+non-GET request) ReplicaPinMiddleware sets a short-lived cookie that keeps
+its reads on the primary until the replicas have caught up, so a freshly
+created post or comment shows up on the next page.
+
+SQLiteReadWriteRouter splits a SQLite deployment into the writer
+("default", BEGIN IMMEDIATE, so writers queue behind one another) and a
+read-only "reader" connection to the same file. With WAL journaling the
+reader never waits for the writer. Enable it with SQLITE_READ_CONNECTION=1.
+"""
+import functools
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+
+WRITER = "default"
+READER = "reader"
+
+PIN_COOKIE = "pin_primary"
+
+# a session missing on a lagging replica would log the user out
+PRIMARY_ONLY_APPS = {"sessions"}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# the replica chosen for the current request, if it may use one
+_replica = ContextVar("replica", default=None)
+
+
+# =========================
+# READ REPLICAS
+# =========================
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def replica_reads(view):
+    """Let a read-only view read from a replica, one per request."""
+
+    def use_replica(request):
+        return (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and not is_pinned(request)
+        )
+
+    if iscoroutinefunction(view):
+        # sync_to_async() copies the context, so the ORM threads see it too
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not use_replica(request):
+                return await view(request, *args, **kwargs)
+            token = _replica.set(random.choice(settings.DATABASE_REPLICAS))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not use_replica(request):
+            return view(request, *args, **kwargs)
+
+        token = _replica.set(random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if (
+            replica is None
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[WRITER].in_atomic_block
+        ):
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return WRITER
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+# =========================
+# SQLITE READ CONNECTION
+# =========================
+class SQLiteReadWriteRouter:
+
+    def db_for_read(self, model, **hints):
+        # inside a transaction read what it wrote, and hold no second lock
+        if connections[WRITER].in_atomic_block:
+            return WRITER
+        return READER
+
+    def db_for_write(self, model, **hints):
+        return WRITER
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases are the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == WRITER
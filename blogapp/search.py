@@ -0,0 +1,297 @@
+"""
+Full-text search over posts.
+
+The index covers the title, the post body with its CKEditor HTML stripped
+and the author's username. SQLite uses an FTS5 table, Postgres a tsvector
+column with a GIN index; both tables are created by migration 0010 and kept
+up to date from signals. Any other backend falls back to LIKE queries.
+"""
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection, connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import fragments, usercards
+from .content import html_to_text
+from .models import Post
+
+
+RESULTS_PER_PAGE = 20
+
+# snippet highlight markers, swapped for <mark> after escaping
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+
+def _document(post):
+    return (
+        post.pk,
+        post.title,
+        html_to_text(post.content),
+        post.author.get_username(),
+    )
+
+
+def _reader():
+    # queries go where the routers send Post reads (a replica inside
+    # replica_reads); index writes stay on the default connection
+    return connections[router.db_for_read(Post)]
+
+
+def _highlight(snippet):
+    if not snippet:
+        return ""
+    snippet = escape(snippet)
+    snippet = snippet.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return mark_safe(snippet)
+
+
+# =========================
+# BACKENDS
+# =========================
+class SQLiteSearchBackend:
+    table = "blogapp_post_fts"
+
+    def _match(self, query):
+        # every word must match, as a prefix, with FTS syntax neutralised
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def index(self, posts):
+        rows = [_document(post) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, body, author) "
+                f"VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(pk,) for pk in post_ids],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def count(self, query):
+        match = self._match(query)
+        if not match:
+            return 0
+        with _reader().cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH %s",
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit, offset):
+        match = self._match(query)
+        if not match:
+            return []
+        with _reader().cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, -bm25({self.table}, 10.0, 1.0, 5.0), "
+                f"snippet({self.table}, 1, char(2), char(3), '…', 24) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY 2 DESC LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    table = "blogapp_post_search"
+    headline_options = (
+        f"StartSel={MARK_START}, StopSel={MARK_END}, "
+        f"MaxWords=35, MinWords=15, MaxFragments=2"
+    )
+
+    def index(self, posts):
+        rows = [_document(post) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {self.table} (post_id, body, document)
+                VALUES (
+                    %(id)s,
+                    %(body)s,
+                    setweight(to_tsvector('english', %(title)s), 'A')
+                    || setweight(to_tsvector('simple', %(author)s), 'B')
+                    || setweight(to_tsvector('english', %(body)s), 'C')
+                )
+                ON CONFLICT (post_id) DO UPDATE
+                SET body = EXCLUDED.body, document = EXCLUDED.document
+                """,
+                [
+                    {"id": pk, "title": title, "body": body, "author": author}
+                    for pk, title, body, author in rows
+                ],
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE post_id = ANY(%s)",
+                [list(post_ids)],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def count(self, query):
+        with _reader().cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {self.table} "
+                f"WHERE document @@ websearch_to_tsquery('english', %s)",
+                [query],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit, offset):
+        with _reader().cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT post_id,
+                       ts_rank_cd(document, q.query),
+                       ts_headline('english', body, q.query, %s)
+                FROM {self.table},
+                     websearch_to_tsquery('english', %s) AS q(query)
+                WHERE document @@ q.query
+                ORDER BY 2 DESC, post_id DESC
+                LIMIT %s OFFSET %s
+                """,
+                [self.headline_options, query, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class BasicSearchBackend:
+    # no index to maintain, LIKE over title and body
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def _matches(self, query):
+        return Post.objects.filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        )
+
+    def count(self, query):
+        return self._matches(query).count()
+
+    def search(self, query, limit, offset):
+        ids = self._matches(query).order_by("-created_at", "-pk").values_list(
+            "pk", flat=True
+        )[offset:offset + limit]
+        return [(pk, 0, "") for pk in ids]
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, BasicSearchBackend)()
+
+
+# =========================
+# RESULTS
+# =========================
+class SearchResults:
+    """Lazy result list that the Paginator can count and slice."""
+
+    def __init__(self, query, backend=None, viewer=None):
+        self.query = query
+        self.backend = backend or get_backend()
+        self.viewer = viewer
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __getitem__(self, page):
+        hits = self.backend.search(
+            self.query,
+            limit=page.stop - page.start,
+            offset=page.start,
+        )
+        posts = (
+            Post.objects
+            .for_viewer(self.viewer)
+            .for_list()
+            .in_bulk([pk for pk, _, _ in hits])
+        )
+
+        results = []
+        for pk, rank, snippet in hits:
+            post = posts.get(pk)
+            if post is None:
+                continue
+            post.search_rank = rank
+            post.snippet = _highlight(snippet)
+            results.append(post)
+        return usercards.attach(results)
+
+
+def search_posts(query, page_number=None, per_page=RESULTS_PER_PAGE, viewer=None):
+    return Paginator(SearchResults(query, viewer=viewer), per_page).get_page(page_number)
+
+
+# =========================
+# INDEX MAINTENANCE
+# =========================
+# changes whenever indexed content does, so result pages can be validated
+# without running the query (see blogapp.conditional)
+INDEX_VERSION = "search-index"
+
+
+def index_version():
+    return fragments.get_version(INDEX_VERSION)
+
+
+def index_posts(posts):
+    get_backend().index(posts)
+    fragments.bump_version(INDEX_VERSION)
+
+
+def remove_posts(post_ids):
+    get_backend().remove(post_ids)
+    fragments.bump_version(INDEX_VERSION)
+
+
+def rebuild_index(batch_size=500):
+    backend = get_backend()
+    backend.clear()
+
+    indexed = 0
+    batch = []
+    for post in Post.objects.select_related("author").iterator(chunk_size=batch_size):
+        batch.append(post)
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        backend.index(batch)
+        indexed += len(batch)
+    fragments.bump_version(INDEX_VERSION)
+    return indexed
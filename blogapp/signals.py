@@ -0,0 +1,210 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import analytics, authcache, counters, fragments, likes, notifications, pubsub, search, usercards
+from .models import Comment, Notification, Post, Profile
+
+
+# =========================
+# LIKES
+# =========================
+@receiver(m2m_changed, sender=Post.likes.through)
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # blogapp.likes writes the through table itself; this covers the admin
+    # and post.likes.add(). pk_set holds the rows add() did not find, so
+    # writers racing on one post can miscount until
+    # `manage.py reconcile_counters`
+    if action == "post_add" and pk_set:
+        if reverse:
+            likes.record(
+                dict.fromkeys(pk_set, 1),
+                [(post_id, instance.pk) for post_id in pk_set],
+            )
+        else:
+            likes.record(
+                {instance.pk: len(pk_set)},
+                [(instance.pk, user_id) for user_id in pk_set],
+            )
+
+    elif action in ("pre_remove", "pre_clear"):
+        instance._pending_unlikes = counters.pending_unlikes(
+            instance,
+            reverse,
+            pk_set if action == "pre_remove" else None,
+        )
+
+    elif action in ("post_remove", "post_clear"):
+        counts = {}
+        for post_ids, delta in instance.__dict__.pop("_pending_unlikes", []):
+            counts.update(dict.fromkeys(post_ids, delta))
+        likes.record(counts)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def release_likes_of_deleted_user(sender, instance, **kwargs):
+    # the through rows go away in the cascade without any m2m signal
+    for post_ids, delta in counters.pending_unlikes(instance, reverse=True):
+        counters.adjust_like_count(post_ids, delta)
+        counters.adjust_author_stats(post_ids, total_likes=delta)
+        fragments.bump(post_ids)
+        pubsub.post_changed(post_ids)
+
+
+# =========================
+# COMMENTS
+# =========================
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_comment_count(instance.post_id, 1)
+        pubsub.post_changed([instance.post_id])
+        analytics.add("comments", {instance.post_id: 1})
+    fragments.bump([instance.post_id])
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    post_author_id = (
+        Post.objects.filter(pk=instance.post_id)
+        .values_list("author_id", flat=True)
+        .first()
+    )
+    events = [
+        notifications.Event(post_author_id, instance.user_id, instance.post_id, "comment"),
+    ]
+
+    if instance.parent_id:
+        parent_author_id = (
+            Comment.objects.filter(pk=instance.parent_id)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if parent_author_id != post_author_id:
+            events.append(notifications.Event(
+                parent_author_id, instance.user_id, instance.post_id, "reply"
+            ))
+
+    notifications.notify(events)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    # also fires for every reply removed by a cascading delete
+    counters.adjust_comment_count(instance.post_id, -1)
+    fragments.bump([instance.post_id])
+    pubsub.post_changed([instance.post_id])
+    # when the post (or the user) is what is being deleted, the stats rows
+    # go with it and must not be recreated
+    if isinstance(origin, Comment):
+        analytics.add("comments", {instance.post_id: -1})
+
+
+# =========================
+# FRAGMENT CACHE
+# =========================
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_fragments(sender, instance, **kwargs):
+    fragments.bump([instance.pk])
+
+
+# =========================
+# AUTHOR STATS
+# =========================
+@receiver(post_save, sender=Post)
+def post_saved_for_author(sender, instance, created, **kwargs):
+    # an edit changes the author's post list too, hence the bare touch
+    counters.adjust_author_stats([instance.pk], post_count=1 if created else 0)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_for_author(sender, instance, **kwargs):
+    counters.remove_from_author_stats(instance)
+
+
+# =========================
+# SEARCH INDEX
+# =========================
+SEARCHABLE_FIELDS = {"title", "content", "author"}
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCHABLE_FIELDS.intersection(update_fields):
+        return
+    search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.remove_posts([instance.pk])
+
+
+# =========================
+# AUTHORS
+# =========================
+@receiver(pre_save, sender=get_user_model())
+def refresh_cached_user(sender, instance, update_fields=None, **kwargs):
+    # a user loaded from the auth cache must not save stale fields back; runs
+    # first so the rename check below compares fresh values
+    authcache.refresh_unchanged(instance, update_fields)
+
+
+@receiver(pre_save, sender=get_user_model())
+def detect_username_change(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields and "username" not in update_fields):
+        return
+    old_username = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("username", flat=True)
+        .first()
+    )
+    instance._username_changed = old_username != instance.username
+
+
+@receiver(post_save, sender=get_user_model())
+def author_renamed(sender, instance, **kwargs):
+    # the username is indexed for search and printed in cached fragments
+    if instance.__dict__.pop("_username_changed", False):
+        posts = list(Post.objects.filter(author=instance).select_related("author"))
+        search.index_posts(posts)
+        fragments.bump([post.pk for post in posts])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_card(sender, instance, update_fields=None, **kwargs):
+    # every login saves last_login, which no card shows
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    usercards.forget([instance.pk])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    # including last_login saves: the cached copy would be out of date
+    authcache.forget([instance.pk])
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_profile_card(sender, instance, **kwargs):
+    usercards.forget([instance.user_id])
+
+
+# =========================
+# NOTIFICATIONS
+# =========================
+@receiver(post_delete, sender=Notification)
+def forget_unread_count(sender, instance, **kwargs):
+    notifications.forget_unread_counts([instance.user_id])
+
+
+@receiver(notifications.notified)
+def push_notifications(sender, rows, **kwargs):
+    pubsub.notification_changed(rows)
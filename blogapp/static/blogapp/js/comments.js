@@ -0,0 +1,10 @@
+// expand collapsed reply threads in place
+document.addEventListener("click", function (event) {
+    const link = event.target.closest("[data-replies-url]");
+    if (!link) return;
+
+    event.preventDefault();
+    fetch(link.dataset.repliesUrl)
+        .then(res => res.text())
+        .then(html => { link.outerHTML = html; });
+});
@@ -0,0 +1,36 @@
+// Like buttons: any element with data-like-url (and data-post-id). The
+// post's count is every element with id like-count-<post id>.
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        document.cookie.split(';').forEach(cookie => {
+            cookie = cookie.trim();
+            if (cookie.startsWith(name + '=')) {
+                cookieValue = decodeURIComponent(cookie.slice(name.length + 1));
+            }
+        });
+    }
+    return cookieValue;
+}
+
+document.addEventListener("click", function (event) {
+    const button = event.target.closest("[data-like-url]");
+    if (!button) return;
+
+    // send the state we want, so a repeated click can't flip it back
+    fetch(button.dataset.likeUrl, {
+        method: "POST",
+        headers: {
+            "X-CSRFToken": getCookie("csrftoken"),
+            "Content-Type": "application/json"
+        },
+        body: JSON.stringify({ liked: !button.classList.contains("liked") })
+    })
+    .then(res => res.json())
+    .then(data => {
+        button.classList.toggle("liked", data.liked);
+        const count = document.getElementById(`like-count-${button.dataset.postId}`);
+        if (count) count.innerText = data.likes_count;
+    });
+});
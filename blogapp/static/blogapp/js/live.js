@@ -0,0 +1,41 @@
+// Live updates over Server-Sent Events (ASGI deployments only). Include as
+// <script src="live.js" data-events-url="..." data-posts="1 2 3" defer>.
+// Counts go into #like-count-<id> and #comment-count-<id>, the unread
+// count into #notification-badge, new notifications on top of #notifications.
+(function () {
+    const script = document.currentScript;
+    const posts = (script.dataset.posts || "").split(" ").filter(Boolean);
+    const query = posts.map(id => `post=${id}`).join("&");
+    const events = new EventSource(script.dataset.eventsUrl + (query ? `?${query}` : ""));
+
+    events.addEventListener("counts", event => {
+        for (const [postId, counts] of Object.entries(JSON.parse(event.data))) {
+            const likes = document.getElementById(`like-count-${postId}`);
+            const comments = document.getElementById(`comment-count-${postId}`);
+            if (likes) likes.innerText = counts.likes;
+            if (comments) comments.innerText = counts.comments;
+        }
+    });
+
+    events.addEventListener("notification", event => {
+        const data = JSON.parse(event.data);
+
+        const badge = document.getElementById("notification-badge");
+        if (badge) badge.innerText = data.unread ? `🔔 ${data.unread}` : "🔔";
+
+        const list = document.getElementById("notifications");
+        if (!list) return;
+        // a merged notification moves up with its new message
+        document.getElementById(`notification-${data.id}`)?.remove();
+        document.getElementById("no-notifications")?.remove();
+
+        const link = document.createElement("a");
+        link.href = data.url;
+        link.id = `notification-${data.id}`;
+        link.className = "notification unread";
+        link.innerHTML = "<div><span></span><br><small></small></div>";
+        link.querySelector("span").textContent = data.message;
+        link.querySelector("small").textContent = new Date(data.created_at).toLocaleString();
+        list.querySelector(".header").after(link);
+    });
+})();
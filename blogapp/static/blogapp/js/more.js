@@ -0,0 +1,40 @@
+// Infinite scroll for cursor-paginated lists. The "older" link carries
+// data-more-url (a JSON endpoint answering {html, next_cursor}),
+// data-cursor and data-target (the id of the list to append to). Pages
+// load when the link scrolls into view or is clicked; without JavaScript
+// it is a plain link to the next page.
+(function () {
+    const link = document.querySelector("[data-more-url]");
+    if (!link) return;
+
+    const list = document.getElementById(link.dataset.target);
+    let loading = false;
+
+    function loadMore() {
+        if (loading) return;
+        loading = true;
+        fetch(`${link.dataset.moreUrl}?cursor=${encodeURIComponent(link.dataset.cursor)}`)
+            .then(res => res.json())
+            .then(data => {
+                list.insertAdjacentHTML("beforeend", data.html);
+                if (data.next_cursor) {
+                    link.dataset.cursor = data.next_cursor;
+                    link.href = `?cursor=${data.next_cursor}`;
+                } else {
+                    observer.disconnect();
+                    link.remove();
+                }
+            })
+            .finally(() => { loading = false; });
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMore();
+    }, { rootMargin: "400px" });
+    observer.observe(link);
+
+    link.addEventListener("click", event => {
+        event.preventDefault();
+        loadMore();
+    });
+})();
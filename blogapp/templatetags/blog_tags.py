@@ -0,0 +1,116 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from .. import usercards
+from ..images import avatar_url
+
+
+register = template.Library()
+
+
+# =========================
+# POST IMAGES
+# =========================
+def _srcset(variants):
+    return ", ".join(f"{v.file.url} {v.width}w" for v in variants)
+
+
+@register.simple_tag
+def post_picture(post, sizes="100vw", alt="", eager=False):
+    """
+    ``<picture>`` for a post image, WebP first with a JPEG fallback. Posts
+    whose variants have not been generated yet get the original image.
+    """
+    if not post.image:
+        if post.image_status == "pending":
+            return format_html('<div class="image-pending">Processing image…</div>')
+        return ""
+
+    loading = "eager" if eager else "lazy"
+    # .all() so a prefetch_related("image_variants") is reused
+    variants = sorted(post.image_variants.all(), key=lambda v: v.width)
+    if not variants:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" decoding="async">',
+            post.image.url, alt, loading,
+        )
+
+    webp = [v for v in variants if v.format == "webp"]
+    jpeg = [v for v in variants if v.format == "jpeg"] or webp
+    largest = jpeg[-1]
+    style = ""
+    if post.image_placeholder:
+        style = f"background: url({post.image_placeholder}) center / cover no-repeat"
+
+    sources = format_html_join(
+        "",
+        '<source type="image/webp" srcset="{}" sizes="{}">',
+        [(_srcset(webp), sizes)] if webp else [],
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'alt="{}" loading="{}" decoding="async" style="{}"></picture>',
+        sources,
+        largest.file.url,
+        _srcset(jpeg),
+        sizes,
+        post.image_width or largest.width,
+        post.image_height or largest.height,
+        alt,
+        loading,
+        style,
+    )
+
+
+# =========================
+# AVATARS
+# =========================
+def _initials(name, size, css_class):
+    # initials, like the profile page shows
+    url = "https://ui-avatars.com/api/?" + urlencode({
+        "name": name, "background": "6366f1", "color": "fff", "size": size * 2,
+    })
+    return format_html(
+        '<img src="{}" width="{}" height="{}" class="{}" alt="{}">',
+        url, size, size, css_class, name,
+    )
+
+
+def _avatar_img(url, url_2x, size, css_class, alt):
+    return format_html(
+        '<img src="{}" srcset="{} 1x, {} 2x" width="{}" height="{}" class="{}" alt="{}">',
+        url, url, url_2x, size, size, css_class, alt,
+    )
+
+
+@register.simple_tag
+def avatar(picture, size, css_class="", alt=""):
+    """Cloudinary-resized avatar with a 2x candidate for dense screens."""
+    size = int(size)
+    if not picture:
+        return _initials(alt, size, css_class)
+    return _avatar_img(
+        avatar_url(picture, size), avatar_url(picture, size * 2), size, css_class, alt,
+    )
+
+
+# =========================
+# USER CARDS
+# =========================
+@register.simple_tag
+def user_card(user_id):
+    """``{% user_card comment.user_id as card %}`` for a one-off lookup."""
+    return usercards.get_card(user_id)
+
+
+@register.simple_tag
+def card_avatar(card, css_class=""):
+    """The avatar of a cached user card, at usercards.AVATAR_SIZE."""
+    size = usercards.AVATAR_SIZE
+    if card is None:
+        return _initials("", size, css_class)
+    if not card.avatar:
+        return _initials(card.username, size, css_class)
+    return _avatar_img(card.avatar, card.avatar_2x, size, css_class, card.username)
@@ -0,0 +1,57 @@
+"""
+Test helpers: keeping views inside their query budgets, and starting each
+test from empty caches.
+
+    @strict_query_budgets
+    class FeedTests(TestCase):
+        def test_feed(self):
+            response = self.client.get(reverse("feed"))  # raises if over budget
+            assert_max_queries(response, 5)
+"""
+from django.core.cache import caches
+from django.test import override_settings
+
+from .instrumentation import QueryBudgetExceeded
+
+
+# settings.QUERY_BUDGETS violations raise instead of only being logged
+strict_query_budgets = override_settings(
+    INSTRUMENTATION_ENABLED=True,
+    QUERY_BUDGET_STRICT=True,
+)
+
+
+def request_metrics(response):
+    metrics = getattr(response, "request_metrics", None)
+    if metrics is None:
+        raise AssertionError(
+            "No request metrics on the response; is "
+            "QueryInstrumentationMiddleware installed and enabled?"
+        )
+    return metrics
+
+
+def assert_max_queries(response, limit):
+    """A tighter limit than the configured budget, for a single request."""
+    metrics = request_metrics(response)
+    if metrics.queries > limit:
+        repeated = "".join(
+            f"\n  {count}x {sql}" for sql, count in metrics.duplicates()
+        )
+        raise QueryBudgetExceeded(
+            f"{metrics.queries} queries, expected at most {limit}{repeated}"
+        )
+
+
+def assert_no_duplicate_queries(response):
+    duplicates = request_metrics(response).duplicates()
+    if duplicates:
+        raise QueryBudgetExceeded("Repeated queries:" + "".join(
+            f"\n  {count}x {sql}" for sql, count in duplicates
+        ))
+
+
+def clear_caches():
+    # fragments, cards and unread counts would otherwise leak between tests
+    for alias in caches:
+        caches[alias].clear()
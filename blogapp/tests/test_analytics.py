@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import analytics, jobs, likes
+from ..models import Comment, Post, PostDailyStats
+from ..testing import clear_caches, strict_query_budgets
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        self.today = timezone.localdate()
+
+    def row(self, day=None):
+        return PostDailyStats.objects.get(post=self.post, date=day or self.today)
+
+    def test_add_creates_and_increments_rows(self):
+        analytics.add("views", {self.post.pk: 3})
+        analytics.add("views", {self.post.pk: 2, 0: 5})
+        self.assertEqual(self.row().views, 5)
+        self.assertEqual(self.row().author, self.author)
+        self.assertEqual(PostDailyStats.objects.count(), 1)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            analytics.add("shares", {self.post.pk: 1})
+
+    def test_likes_and_comments_are_net_changes(self):
+        likes.set_liked(self.reader, self.post.pk, True)
+        likes.set_liked(self.reader, self.post.pk, False)
+        comment = Comment.objects.create(post=self.post, user=self.reader, content="hi")
+        comment.delete()
+        jobs.run_pending()
+
+        row = self.row()
+        self.assertEqual((row.likes, row.comments), (0, 0))
+
+    def test_series_is_zero_filled(self):
+        yesterday = self.today - timedelta(days=1)
+        analytics.add("views", {self.post.pk: 4}, day=yesterday)
+        analytics.add("likes", {self.post.pk: 1})
+
+        series = analytics.author_series(self.author, days=7)
+        self.assertEqual(len(series.labels), 7)
+        self.assertEqual(series.views, [0, 0, 0, 0, 0, 4, 0])
+        self.assertEqual(series.likes, [0, 0, 0, 0, 0, 0, 1])
+
+    def test_old_days_fall_out_of_the_window(self):
+        analytics.add("views", {self.post.pk: 9}, day=self.today - timedelta(days=7))
+        self.assertEqual(sum(analytics.author_series(self.author, days=7).views), 0)
+        self.assertEqual(analytics.top_posts(self.author, days=7), [])
+
+    def test_top_posts(self):
+        other = Post.objects.create(author=self.author, title="u", content="c")
+        analytics.add("views", {self.post.pk: 1, other.pk: 5})
+        self.assertEqual(
+            [post.post_id for post in analytics.top_posts(self.author, days=7)],
+            [other.pk, self.post.pk],
+        )
+
+    def test_clean_range(self):
+        self.assertEqual(analytics.clean_range("30"), 30)
+        for value in (None, "abc", "3"):
+            self.assertEqual(analytics.clean_range(value), analytics.DEFAULT_RANGE)
+
+
+@strict_query_budgets
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.post = Post.objects.create(author=self.author, title="Counted", content="c")
+        analytics.add("views", {self.post.pk: 6})
+        self.client.force_login(self.author)
+
+    def test_reads_the_rollups(self):
+        response = self.client.get(reverse("dashboard"), {"days": "7"})
+        self.assertEqual(response.context["chart_data"][-1], 6)
+        self.assertEqual(response.context["top_posts"][0].title, "Counted")
@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from .. import assets
+
+
+SOURCES = os.path.join(os.path.dirname(assets.__file__), "static")
+
+class MinifierTests(SimpleTestCase):
+
+    def test_css(self):
+        source = """
+            /* card */
+            .post > .header ,  .a {
+                content: "a  ;  b";
+                margin: 0 auto;
+            }
+        """
+        self.assertEqual(
+            assets.minify_css(source), '.post>.header,.a{content:"a  ;  b";margin:0 auto}'
+        )
+
+    def test_js(self):
+        source = """
+            // toggle a like
+            const url = "//example.com";
+
+                fetch(url);  // inline comments stay
+        """
+        self.assertEqual(
+            assets.minify_js(source),
+            'const url = "//example.com";\nfetch(url);  // inline comments stay\n',
+        )
+
+    def test_only_our_own_sources_are_minified(self):
+        self.assertIs(assets.minifier("blogapp/css/feed.css"), assets.minify_css)
+        self.assertIs(assets.minifier("blogapp/js/likes.js"), assets.minify_js)
+        self.assertIsNone(assets.minifier("blogapp/js/vendor.min.js"))
+        self.assertIsNone(assets.minifier("blogapp/img/logo.png"))
+        self.assertIsNone(assets.minifier("admin/css/base.css"))
+
+
+class AssetStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        static_root = override_settings(
+            STATIC_ROOT=root.name,
+            # this app's files only: the admin's would take a while to compress
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATICFILES_DIRS=[SOURCES],
+            DEBUG=False,
+        )
+        static_root.enable()
+        self.addCleanup(static_root.disable)
+        self.root = root.name
+
+    def test_without_a_manifest_names_are_left_alone(self):
+        self.assertEqual(static("blogapp/css/feed.css"), "/static/blogapp/css/feed.css")
+        self.assertEqual([e.id for e in assets.check_manifest(None)], ["blogapp.E001"])
+
+    def test_build_assets(self):
+        out = StringIO()
+        call_command("build_assets", stdout=out, verbosity=0)
+
+        with open(os.path.join(self.root, "staticfiles.json")) as fh:
+            hashed = json.load(fh)["paths"]["blogapp/css/feed.css"]
+        self.assertRegex(hashed, r"^blogapp/css/feed\.[0-9a-f]{12}\.css$")
+        self.assertEqual(static("blogapp/css/feed.css"), f"/static/{hashed}")
+        self.assertIn(hashed, out.getvalue())
+
+        path = os.path.join(self.root, hashed)
+        with open(path) as fh:
+            minified = fh.read()
+        with open(os.path.join(SOURCES, "blogapp/css/feed.css")) as fh:
+            self.assertEqual(minified, assets.minify_css(fh.read()))
+        with gzip.open(path + ".gz", "rt") as fh:
+            self.assertEqual(fh.read(), minified)
+        self.assertTrue(os.path.exists(path + ".br"))
+
+        self.assertEqual(assets.check_manifest(None), [])
+        # not collected: linked as it is rather than failing the page
+        self.assertEqual(staticfiles_storage.stored_name("blogapp/missing.css"), "blogapp/missing.css")
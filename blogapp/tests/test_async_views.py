@@ -0,0 +1,92 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from .. import async_views, jobs, likes
+from ..models import Comment, Notification, Post
+from ..testing import clear_caches
+
+
+@override_settings(ROOT_URLCONF="blog.asgi_urls")
+class AsyncViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="hello world", content="c")
+        Comment.objects.create(post=self.post, user=self.reader, content="first!")
+        likes.set_liked(self.reader, self.post.pk, True)
+        jobs.run_pending()
+
+    def test_read_views_are_async(self):
+        for name, view in [
+            ("post_list", async_views.post_list),
+            ("feed", async_views.feed_view),
+            ("search_posts", async_views.search_posts),
+            ("notifications", async_views.notifications),
+        ]:
+            self.assertIs(resolve(reverse(name)).func, view)
+        self.assertIs(resolve(reverse("post_detail", args=[1])).func, async_views.post_detail)
+        # everything else falls through to the sync URLconf
+        self.assertEqual(resolve(reverse("dashboard")).func.__module__, "blogapp.views")
+
+    async def test_post_list(self):
+        response = await self.async_client.get(reverse("post_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "hello world")
+        self.assertIn("ETag", response)
+
+    async def test_feed_needs_a_login(self):
+        response = await self.async_client.get(reverse("feed"))
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse("feed"))
+        self.assertContains(response, "like-count-%d" % self.post.pk)
+
+    def test_the_viewer_is_loaded_once(self):
+        # the sync client runs async views too, and can count their queries
+        self.client.force_login(self.reader)
+        with self.assertNumQueries(6):
+            self.client.get(reverse("feed"))
+
+    async def test_post_detail(self):
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse("post_detail", args=[self.post.pk]))
+        self.assertContains(response, "first!")
+        self.assertTrue(response.context["is_liked"])
+
+    async def test_missing_post_is_404(self):
+        response = await self.async_client.get(reverse("post_detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_are_posted_through_the_sync_view(self):
+        self.client.force_login(self.reader)
+        url = reverse("post_detail", args=[self.post.pk])
+        with override_settings(ROOT_URLCONF="blog.urls"):
+            with CaptureQueriesContext(connection) as sync_queries:
+                self.client.post(url, {"content": "sync"})
+        # the async wrapper's validators are reused, not queried again
+        with self.assertNumQueries(len(sync_queries)):
+            response = self.client.post(url, {"content": "async"})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(content="async").exists())
+
+    async def test_search(self):
+        response = await self.async_client.get(reverse("search_posts") + "?q=hello")
+        self.assertContains(response, "hello world")
+
+        response = await self.async_client.get(reverse("search_posts") + "?q=Author")
+        self.assertRedirects(
+            response, reverse("user_profile", args=["author"]), fetch_redirect_response=False
+        )
+
+    async def test_notifications_are_marked_read(self):
+        await self.async_client.aforce_login(self.author)
+        response = await self.async_client.get(reverse("notifications"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["notifications"]), 2)
+        self.assertFalse(await Notification.objects.filter(is_read=False).aexists())
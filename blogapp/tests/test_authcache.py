@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import authcache
+from ..testing import clear_caches
+
+
+BACKEND = "blogapp.authcache.CachedModelBackend"
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=[BACKEND],
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class CachedModelBackendTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user", "user@example.com", "secret-pass-1")
+        self.backend = authcache.CachedModelBackend()
+
+    def test_users_are_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_missing_users_are_not_cached(self):
+        self.assertIsNone(self.backend.get_user(0))
+        with self.assertNumQueries(1):
+            self.backend.get_user(0)
+
+    def test_saves_drop_the_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = "Ada"
+        self.user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).first_name, "Ada")
+
+    def test_deactivated_users_are_refused(self):
+        self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_authenticated_requests_need_no_user_query(self):
+        self.client.force_login(self.user, backend=BACKEND)
+        url = reverse("notifications")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("django_session", tables)
+        self.assertNotIn("auth_user", tables)
+
+    def test_a_password_change_logs_other_sessions_out(self):
+        self.client.force_login(self.user, backend=BACKEND)
+        self.client.get(reverse("notifications"))
+
+        self.user.set_password("secret-pass-2")
+        self.user.save()
+        response = self.client.get(reverse("notifications"))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+class RefreshUnchangedTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user", "user@example.com")
+        backend = authcache.CachedModelBackend()
+        backend.get_user(self.user.pk)
+        self.cached = backend.get_user(self.user.pk)
+        # changed behind the cache's back: no signal, the entry is stale
+        User.objects.filter(pk=self.user.pk).update(email="new@example.com", is_active=False)
+
+    def test_stale_fields_are_not_written_back(self):
+        self.cached.first_name = "Ada"
+        self.cached.save()
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, "Ada")
+        self.assertEqual(user.email, "new@example.com")
+        self.assertFalse(user.is_active)
+
+    def test_only_the_fields_being_saved_are_refreshed(self):
+        self.cached.first_name = "Ada"
+        with self.assertNumQueries(2):
+            self.cached.save(update_fields=["first_name", "email"])
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.first_name, user.email), ("Ada", "new@example.com"))
+        # not saved, so not re-read either
+        self.assertTrue(self.cached.is_active)
+
+    def test_edited_fields_win(self):
+        self.cached.email = "mine@example.com"
+        self.cached.save(update_fields=["email"])
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, "mine@example.com")
+
+    def test_users_not_from_the_cache_are_saved_as_they_are(self):
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=["email"])
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, "user@example.com")
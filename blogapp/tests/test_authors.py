@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import authors, counters, likes, usercards
+from ..models import AuthorStats, Post, Profile
+from ..testing import clear_caches, strict_query_budgets
+
+
+class AuthorStatsTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        Post.objects.filter(pk=self.post.pk).update(views=5)
+        likes.set_liked(self.reader, self.post.pk, True)
+
+    def stats(self):
+        return AuthorStats.objects.get(user=self.author)
+
+    def assertStats(self, post_count, total_views, total_likes):
+        stats = self.stats()
+        self.assertEqual(
+            (stats.post_count, stats.total_views, stats.total_likes),
+            (post_count, total_views, total_likes),
+        )
+
+    def test_first_visit_counts_the_posts(self):
+        self.assertFalse(AuthorStats.objects.exists())
+        with self.assertNumQueries(2):
+            stats = authors.get_stats(self.author)
+        self.assertEqual((stats.post_count, stats.total_views, stats.total_likes), (1, 5, 1))
+
+        # the new row is cached on the user, and read once for any other instance
+        with self.assertNumQueries(0):
+            self.assertEqual(authors.get_stats(self.author).pk, stats.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(authors.get_stats(User(pk=self.author.pk)).pk, stats.pk)
+
+    def test_select_related_stats_are_free(self):
+        authors.get_stats(self.author)
+        user = User.objects.select_related("author_stats").get(pk=self.author.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(authors.get_stats(user).post_count, 1)
+
+    def test_writes_keep_the_stats_current(self):
+        authors.get_stats(self.author)
+
+        other = Post.objects.create(author=self.author, title="t2", content="c")
+        self.assertStats(2, 5, 1)
+        likes.set_liked(self.reader, other.pk, True)
+        self.assertStats(2, 5, 2)
+        likes.set_liked(self.reader, self.post.pk, False)
+        self.assertStats(2, 5, 1)
+
+        other.refresh_from_db()
+        other.delete()
+        self.assertStats(1, 5, 0)
+
+    def test_reconcile(self):
+        authors.get_stats(self.author)
+        AuthorStats.objects.update(post_count=9, total_views=0)
+
+        self.assertEqual(counters.reconcile_author_stats(dry_run=True), 1)
+        self.assertEqual(self.stats().post_count, 9)
+
+        self.assertEqual(counters.reconcile_author_stats(), 1)
+        self.assertStats(1, 5, 1)
+        self.assertEqual(counters.reconcile_author_stats(), 0)
+
+
+class AuthorPostsPageTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        now = timezone.now()
+        posts = [
+            Post.objects.create(author=self.author, title=f"p{i}", content="c")
+            for i in range(authors.PAGE_SIZE + 3)
+        ]
+        # ties on created_at are broken by id
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(created_at=now)
+        Post.objects.filter(pk=posts[0].pk).update(created_at=now - timedelta(days=1))
+        Post.objects.create(author=User.objects.create_user("other"), title="x", content="c")
+        self.expected = list(
+            Post.objects.filter(author=self.author)
+            .order_by("-created_at", "-pk")
+            .values_list("pk", flat=True)
+        )
+
+    def test_pages_walk_the_authors_posts(self):
+        first = authors.get_posts_page(self.author)
+        self.assertEqual(len(first.posts), authors.PAGE_SIZE)
+        self.assertTrue(first.has_more)
+
+        second = authors.get_posts_page(self.author, first.next_cursor)
+        self.assertFalse(second.has_more)
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(
+            [post.pk for post in first.posts + second.posts], self.expected
+        )
+
+
+@strict_query_budgets
+class ProfilePageTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        for i in range(authors.PAGE_SIZE + 2):
+            Post.objects.create(author=self.author, title=f"post {i}", content="c")
+        # what the first visit creates
+        Profile.objects.create(user=self.author)
+        authors.get_stats(self.author)
+        usercards.get_card(self.author.pk)
+        self.client.force_login(self.author)
+
+    def test_profile_shows_the_stats_and_one_page(self):
+        response = self.client.get(reverse("user_profile", args=["author"]))
+        self.assertEqual(response.context["stats"].post_count, authors.PAGE_SIZE + 2)
+        self.assertEqual(len(response.context["posts"]), authors.PAGE_SIZE)
+        self.assertIsNotNone(response.context["next_cursor"])
+
+    def test_more_posts_as_json(self):
+        first = self.client.get(reverse("profile"))
+        response = self.client.get(
+            reverse("author_posts", args=["author"]),
+            {"cursor": first.context["next_cursor"]},
+        )
+        data = response.json()
+        self.assertIsNone(data["next_cursor"])
+        self.assertIn("post 1", data["html"])
+        self.assertNotIn("post 2", data["html"])
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(reverse("author_posts", args=["author"]), {"cursor": "x"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_my_posts_is_paged_too(self):
+        response = self.client.get(reverse("my_posts"))
+        self.assertEqual(len(response.context["posts"]), authors.PAGE_SIZE)
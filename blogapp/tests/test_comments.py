@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from ..comments import comment_subtree, comment_threads
+from ..models import Comment, Post
+from ..testing import assert_max_queries, clear_caches, strict_query_budgets
+
+
+class CommentTreeTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user")
+        self.post = Post.objects.create(author=self.user, title="t", content="c")
+
+    def comment(self, content, parent=None, post=None):
+        return Comment.objects.create(
+            post=post or self.post, user=self.user, content=content, parent=parent
+        )
+
+    def chain(self, parent, length):
+        for i in range(length):
+            parent = self.comment(f"{parent.content}.{i}", parent)
+        return parent
+
+    def test_threads_are_built_in_one_query(self):
+        first = self.comment("first")
+        self.comment("reply", first)
+        self.comment("second")
+
+        with self.assertNumQueries(1):
+            page = comment_threads(self.post)
+            roots = list(page)
+
+        self.assertEqual([root.content for root in roots], ["first", "second"])
+        self.assertEqual([child.content for child in roots[0].children], ["reply"])
+        self.assertEqual((roots[0].reply_count, roots[1].reply_count), (1, 0))
+
+    def test_deep_threads_collapse_at_max_depth(self):
+        root = self.comment("root")
+        self.chain(root, 6)
+
+        node = list(comment_threads(self.post))[0]
+        for _ in range(4):
+            self.assertFalse(node.collapsed)
+            node = node.children[0]
+        self.assertEqual(node.depth, 4)
+        self.assertTrue(node.collapsed)
+        self.assertEqual(node.reply_count, 2)
+
+    def test_subtree_loads_only_its_replies(self):
+        root = self.comment("root")
+        self.chain(root, 6)
+        self.comment("sibling", root)
+        unrelated = self.comment("unrelated")
+        self.chain(unrelated, 3)
+
+        with self.assertNumQueries(2):
+            node = comment_subtree(root.pk, max_depth=2)
+
+        loaded = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            loaded.append(current.content)
+            stack.extend(current.children)
+        self.assertNotIn("unrelated", loaded)
+        self.assertEqual(len(loaded), 4)
+
+        deepest = node.children[0].children[0]
+        self.assertEqual(deepest.depth, 2)
+        self.assertTrue(deepest.collapsed)
+        # counted, not loaded
+        self.assertEqual(deepest.children, [])
+        self.assertEqual(deepest.reply_count, 4)
+        self.assertEqual(node.reply_count, 7)
+
+    def test_subtree_of_a_leaf(self):
+        leaf = self.comment("leaf")
+        node = comment_subtree(leaf.pk)
+        self.assertEqual((node.children, node.reply_count, node.collapsed), ([], 0, False))
+
+
+@strict_query_budgets
+class CommentRepliesViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user")
+        self.post = Post.objects.create(author=self.user, title="t", content="c")
+        self.root = Comment.objects.create(post=self.post, user=self.user, content="root")
+        Comment.objects.create(post=self.post, user=self.user, content="a reply", parent=self.root)
+
+    def test_renders_the_replies(self):
+        response = self.client.get(reverse("comment_replies", args=[self.root.pk]))
+        self.assertContains(response, "a reply")
+        self.assertNotContains(response, ">root<")
+        assert_max_queries(response, 3)
+
+    def test_missing_comment_is_404(self):
+        response = self.client.get(reverse("comment_replies", args=[0]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import authors, likes, usercards
+from ..models import Comment, Post, Profile
+from ..testing import (
+    assert_max_queries,
+    clear_caches,
+    strict_query_budgets,
+)
+
+
+@strict_query_budgets
+class ConditionalViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        self.url = reverse("post_detail", args=[self.post.pk])
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_post_is_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+
+        again = self.revalidate(self.url, response)
+        self.assertEqual(again.status_code, 304)
+        assert_max_queries(again, 2)
+
+    def test_changed_post_is_rendered_again(self):
+        response = self.client.get(self.url)
+
+        Comment.objects.create(post=self.post, user=self.reader, content="hi")
+        again = self.revalidate(self.url, response)
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], response["ETag"])
+
+        likes.set_liked(self.reader, self.post.pk, True)
+        self.assertEqual(self.revalidate(self.url, again).status_code, 200)
+
+    def test_etag_is_per_viewer(self):
+        anonymous = self.client.get(self.url)
+
+        self.client.force_login(self.reader)
+        # the first page sets the CSRF cookie, which is part of the ETag
+        self.client.get(self.url)
+        response = self.revalidate(self.url, anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(self.revalidate(self.url, response).status_code, 304)
+
+    def test_post_list_changes_with_a_new_post(self):
+        url = reverse("post_list")
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        Post.objects.create(author=self.author, title="new", content="c")
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse("post_detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_changes_with_a_new_post(self):
+        url = reverse("search_posts") + "?q=t"
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        Post.objects.create(author=self.author, title="t2", content="c")
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_search_for_a_username_has_no_etag(self):
+        response = self.client.get(reverse("search_posts") + "?q=AUTHOR")
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_profile_changes_with_the_authors_posts(self):
+        # what the first visit creates, and the cached author card
+        Profile.objects.create(user=self.author)
+        authors.get_stats(self.author)
+        usercards.get_card(self.author.pk)
+
+        url = reverse("user_profile", args=["author"])
+        self.client.force_login(self.reader)
+        self.client.get(url)  # sets the CSRF cookie
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        Post.objects.create(author=self.author, title="new", content="c")
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from ..content import render_content, sanitize_html
+from ..models import Post
+
+
+class SanitizeHtmlTests(SimpleTestCase):
+
+    def test_drops_script_and_its_content(self):
+        self.assertEqual(
+            sanitize_html("<p>hi<script>alert(1)</script></p>"),
+            "<p>hi</p>",
+        )
+
+    def test_drops_event_handler_attributes(self):
+        self.assertEqual(
+            sanitize_html('<img src="a.png" onerror="alert(1)">'),
+            '<img src="a.png">',
+        )
+
+    def test_drops_javascript_urls(self):
+        self.assertEqual(
+            sanitize_html('<a href=" JavaScript:alert(1)">x</a>'),
+            "<a>x</a>",
+        )
+
+    def test_keeps_safe_styles_only(self):
+        self.assertEqual(
+            sanitize_html(
+                '<p style="color: red; background-color: url(x.png); position: fixed">x</p>'
+            ),
+            '<p style="color: red">x</p>',
+        )
+
+    def test_unknown_tags_keep_their_text(self):
+        self.assertEqual(sanitize_html("<marquee>hey</marquee>"), "hey")
+
+    def test_escapes_text_and_attribute_values(self):
+        self.assertEqual(
+            sanitize_html('<a href="/?a=1&b=&quot;2" title="x">&lt;b&gt;</a>'),
+            '<a href="/?a=1&amp;b=&quot;2" title="x">&lt;b&gt;</a>',
+        )
+
+    def test_blank_target_gets_noopener(self):
+        self.assertEqual(
+            sanitize_html('<a href="https://example.com" target="_blank">x</a>'),
+            '<a href="https://example.com" target="_blank" rel="noopener noreferrer">x</a>',
+        )
+
+    def test_closes_unclosed_tags(self):
+        self.assertEqual(sanitize_html("<ul><li><b>x</ul>"), "<ul><li><b>x</b></li></ul>")
+        self.assertEqual(sanitize_html("<p><em>x"), "<p><em>x</em></p>")
+
+    def test_render_content_excerpt_and_word_count(self):
+        rendered = render_content("<p>One two</p><p>three<script>four</script></p>")
+        self.assertEqual(rendered.excerpt, "One two three")
+        self.assertEqual(rendered.word_count, 3)
+
+
+class PostContentTests(TestCase):
+
+    def test_save_stores_sanitized_html(self):
+        author = User.objects.create_user("author")
+        post = Post.objects.create(
+            author=author, title="t", content='<p onclick="x()">hello</p><script>x()</script>'
+        )
+        self.assertEqual(post.content_html, "<p>hello</p>")
+        self.assertEqual(post.excerpt, "hello")
+
+    def test_edit_renders_again(self):
+        author = User.objects.create_user("author")
+        post = Post.objects.create(author=author, title="t", content="<p>one</p>")
+        post.content = "<p>one two</p>"
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.word_count), ("<p>one two</p>", 2))
@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .. import counters, likes
+from ..models import Comment, Post
+from ..testing import clear_caches
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+
+    def like_count(self):
+        self.post.refresh_from_db(fields=["like_count", "comment_count"])
+        return self.post.like_count
+
+    def test_manager_writes_are_counted(self):
+        # the admin and post.likes.add() go through the m2m signals
+        self.post.likes.add(self.reader, self.author)
+        self.assertEqual(self.like_count(), 2)
+        self.reader.liked_posts.remove(self.post)
+        self.assertEqual(self.like_count(), 1)
+
+    def test_counters_never_go_negative(self):
+        counters.adjust_like_count([self.post.pk], -5)
+        counters.adjust_comment_count(self.post.pk, -5)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 0))
+
+    def test_comment_count(self):
+        root = Comment.objects.create(post=self.post, user=self.reader, content="a")
+        Comment.objects.create(post=self.post, user=self.author, content="b", parent=root)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+        # the reply goes with its parent
+        root.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_deleting_a_user_releases_their_likes(self):
+        likes.set_liked(self.reader, self.post.pk, True)
+        self.reader.delete()
+        self.assertEqual(self.like_count(), 0)
+
+    def test_reconcile_fixes_drift(self):
+        likes.set_liked(self.reader, self.post.pk, True)
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=3)
+
+        self.assertEqual(counters.reconcile_counters(dry_run=True), 1)
+        self.assertEqual(self.like_count(), 7)
+
+        self.assertEqual(counters.reconcile_counters(), 1)
+        self.assertEqual((self.like_count(), self.post.comment_count), (1, 0))
+        self.assertEqual(counters.reconcile_counters(), 0)
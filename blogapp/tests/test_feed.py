@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..feed import InvalidCursor, decode_cursor, encode_cursor, get_feed_page
+from ..models import Post
+from ..testing import assert_no_duplicate_queries, clear_caches, strict_query_budgets
+
+
+class FeedPaginationTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        posts = [
+            Post.objects.create(author=self.author, title=f"p{i}", content="c")
+            for i in range(25)
+        ]
+        # several posts share a timestamp, so the id has to break ties
+        now = timezone.now()
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(created_at=now - timedelta(minutes=i // 4))
+        self.expected = list(
+            Post.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+
+    def test_walks_every_post_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            page = get_feed_page(cursor=cursor, page_size=10)
+            seen += [post.pk for post in page.posts]
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(seen, self.expected)
+        self.assertIsNone(page.next_cursor)
+
+    def test_new_posts_do_not_shift_later_pages(self):
+        first = get_feed_page(page_size=10)
+        Post.objects.create(author=self.author, title="new", content="c")
+        second = get_feed_page(cursor=first.next_cursor, page_size=10)
+        self.assertEqual([post.pk for post in second.posts], self.expected[10:20])
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.get(pk=self.expected[0])
+        self.assertEqual(decode_cursor(encode_cursor(post)), (post.created_at, post.pk))
+
+    def test_invalid_cursor(self):
+        for token in ("", "not-a-cursor", "bm90fGE"):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+
+@strict_query_budgets
+class FeedViewTests(FeedPaginationTests):
+
+    def test_post_list_pages(self):
+        response = self.client.get(reverse("post_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.pk for post in response.context["posts"]], self.expected[:20]
+        )
+        assert_no_duplicate_queries(response)
+
+        response = self.client.get(
+            reverse("post_list"), {"cursor": response.context["next_cursor"]}
+        )
+        self.assertEqual([post.pk for post in response.context["posts"]], self.expected[20:])
+
+    def test_feed_invalid_cursor_is_404(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("feed"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
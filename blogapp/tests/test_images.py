@@ -0,0 +1,97 @@
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from .. import images
+from ..models import Post, PostImageVariant
+from ..templatetags.blog_tags import post_picture
+from ..testing import clear_caches
+
+
+def image_file(size, mode="RGB", fmt="PNG"):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(
+        buffer, format=fmt
+    )
+    return ContentFile(buffer.getvalue(), name=f"upload.{fmt.lower()}")
+
+
+class VariantWidthTests(SimpleTestCase):
+
+    def test_never_upscales(self):
+        self.assertEqual(images.variant_widths(500), [320, 500])
+        self.assertEqual(images.variant_widths(200), [200])
+
+    def test_tops_out_at_the_largest_tier(self):
+        self.assertEqual(images.variant_widths(4000), [320, 640, 960, 1280])
+
+
+class PostVariantTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(
+            MEDIA_ROOT=media.name,
+            STORAGES={
+                **settings.STORAGES,
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            },
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        author = User.objects.create_user("author")
+        self.post = Post.objects.create(author=author, title="t", content="c")
+
+    def test_builds_webp_and_jpeg_variants(self):
+        self.post.image.save("photo.png", image_file((1000, 500), "RGBA"), save=False)
+        variants = images.generate_post_variants(self.post)
+
+        self.assertEqual(
+            sorted((v.format, v.width, v.height) for v in variants),
+            [
+                ("jpeg", 320, 160), ("jpeg", 640, 320), ("jpeg", 960, 480), ("jpeg", 1000, 500),
+                ("webp", 320, 160), ("webp", 640, 320), ("webp", 960, 480), ("webp", 1000, 500),
+            ],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.image_width, self.post.image_height), (1000, 500))
+        self.assertTrue(self.post.image_placeholder.startswith("data:image/jpeg;base64,"))
+        self.assertEqual(self.post.image_status, "ready")
+
+        jpeg = PostImageVariant.objects.get(post=self.post, format="jpeg", width=320)
+        with jpeg.file.open("rb") as fh:
+            self.assertEqual(Image.open(fh).mode, "RGB")
+
+    def test_picture_markup(self):
+        self.post.image.save("photo.png", image_file((700, 350)), save=False)
+        images.generate_post_variants(self.post)
+
+        html = post_picture(self.post, sizes="50vw")
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn("320w", html)
+        self.assertIn('width="700" height="350"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_removing_the_image_clears_variants(self):
+        self.post.image.save("photo.png", image_file((400, 400)), save=False)
+        images.generate_post_variants(self.post)
+        self.post.image = None
+        images.generate_post_variants(self.post)
+
+        self.assertFalse(self.post.image_variants.exists())
+        self.post.refresh_from_db()
+        self.assertIsNone(self.post.image_width)
+        self.assertEqual(post_picture(self.post), "")
+
+    def test_unreadable_upload(self):
+        self.post.image.save("photo.png", ContentFile(b"not an image"), save=False)
+        with self.assertRaises(images.ImageProcessingError):
+            images.generate_post_variants(self.post)
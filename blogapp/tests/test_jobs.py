@@ -0,0 +1,141 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import images, jobs
+from ..models import Job, Post
+from ..testing import clear_caches
+from .test_images import image_file
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.failures = []
+        handlers = mock.patch.dict(jobs.HANDLERS, {
+            "ok": (lambda **payload: self.calls.append(payload), None),
+            "broken": (self.broken, lambda **payload: self.failures.append(payload)),
+        })
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def broken(self, **payload):
+        self.calls.append(payload)
+        raise RuntimeError("boom")
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_unknown_kind(self):
+        with self.assertRaises(jobs.UnknownJob):
+            jobs.enqueue("nope")
+
+    def test_runs_with_the_payload(self):
+        job = jobs.enqueue("ok", {"post_id": 1})
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [{"post_id": 1}])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("done", 1))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_delayed_jobs_wait(self):
+        jobs.enqueue("ok", delay=timedelta(minutes=1))
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue("broken", {"n": 1}, max_attempts=3)
+
+        for attempt, delay in ((1, jobs.RETRY_DELAY), (2, jobs.RETRY_DELAY * 2)):
+            before = timezone.now()
+            with self.assertLogs("blogapp.jobs", "WARNING"):
+                jobs.run_pending()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ("queued", attempt))
+            self.assertIn("RuntimeError: boom", job.last_error)
+            self.assertGreaterEqual(job.run_after, before + delay)
+            self.assertLess(job.run_after, before + delay * 2)
+            # not due again until the backoff has passed
+            self.assertEqual(jobs.run_pending(), 0)
+            self.make_due(job)
+
+        with self.assertLogs("blogapp.jobs", "ERROR"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertEqual(self.failures, [{"n": 1}])
+        self.assertEqual(len(self.calls), 3)
+
+    def test_a_claimed_job_is_not_handed_out_twice(self):
+        jobs.enqueue("ok")
+        self.assertEqual(len(jobs.claim()), 1)
+        self.assertEqual(jobs.claim(), [])
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = jobs.enqueue("ok")
+        [claimed] = jobs.claim()
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - jobs.LOCK_TIMEOUT - timedelta(seconds=1)
+        )
+
+        [reclaimed] = jobs.claim()
+        self.assertEqual(reclaimed.attempts, 2)
+        # the first worker finishing late doesn't overwrite the new claim
+        jobs.run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+
+class ImageUploadJobTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(
+            MEDIA_ROOT=f"{media.name}/media",
+            STORAGES={
+                **settings.STORAGES,
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "image_staging": {
+                    "BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {"location": f"{media.name}/staging"},
+                },
+            },
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        author = User.objects.create_user("author")
+        self.post = Post.objects.create(author=author, title="t", content="c")
+
+    def test_upload_is_stored_by_the_worker(self):
+        images.queue_upload(self.post, image_file((400, 300)))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_status, "pending")
+        self.assertFalse(self.post.image)
+
+        jobs.run_pending()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_status, "ready")
+        self.assertEqual((self.post.image_width, self.post.image_height), (400, 300))
+        self.assertTrue(self.post.image_variants.exists())
+        self.assertEqual(images._staging().listdir(str(self.post.pk))[1], [])
+
+    def test_failed_upload_is_marked_and_cleaned_up(self):
+        images.queue_upload(self.post, ContentFile(b"not an image", name="upload.png"))
+        Job.objects.update(max_attempts=1)
+
+        with self.assertLogs("blogapp.jobs", "ERROR"):
+            jobs.run_pending()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_status, "failed")
+        self.assertEqual(images._staging().listdir(str(self.post.pk))[1], [])
@@ -0,0 +1,139 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import jobs, likes
+from ..models import Notification, Post, PostDailyStats
+from ..testing import (
+    assert_max_queries,
+    assert_no_duplicate_queries,
+    clear_caches,
+    strict_query_budgets,
+)
+
+
+class LikeServiceTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+
+    def like_count(self):
+        self.post.refresh_from_db(fields=["like_count", "comment_count"])
+        return self.post.like_count
+
+    def test_set_liked_is_idempotent(self):
+        self.assertEqual(likes.set_liked(self.reader, self.post.pk, True), (True, 1))
+        self.assertEqual(likes.set_liked(self.reader, self.post.pk, True), (True, 1))
+        self.assertEqual(self.like_count(), 1)
+
+        self.assertEqual(likes.set_liked(self.reader, self.post.pk, False), (False, 0))
+        self.assertEqual(likes.set_liked(self.reader, self.post.pk, False), (False, 0))
+        self.assertEqual(self.like_count(), 0)
+
+    def test_toggle(self):
+        self.assertEqual(likes.toggle(self.reader, self.post.pk), (True, 1))
+        self.assertEqual(likes.toggle(self.reader, self.post.pk), (False, 0))
+
+    def test_batch(self):
+        other = Post.objects.create(author=self.author, title="u", content="c")
+        likes.set_liked(self.reader, other.pk, True)
+
+        states = likes.apply_batch(self.reader, {self.post.pk: True, other.pk: False, 0: True})
+
+        self.assertEqual(states, {
+            self.post.pk: likes.LikeState(True, 1),
+            other.pk: likes.LikeState(False, 0),
+        })
+        other.refresh_from_db()
+        self.assertEqual((self.like_count(), other.like_count), (1, 0))
+
+    def test_unknown_post(self):
+        with self.assertRaises(likes.UnknownPost):
+            likes.set_liked(self.reader, 0, True)
+        with self.assertRaises(likes.UnknownPost):
+            likes.toggle(self.reader, "x")
+
+    def test_rollup_and_notification_are_queued(self):
+        likes.set_liked(self.reader, self.post.pk, True)
+        self.assertFalse(PostDailyStats.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+        jobs.run_pending()
+        self.assertEqual(PostDailyStats.objects.get(post=self.post).likes, 1)
+        self.assertEqual(Notification.objects.get().user, self.author)
+
+
+@strict_query_budgets
+class LikeViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        self.client.force_login(self.reader)
+
+    def like(self, liked):
+        return self.client.post(
+            reverse("like_post", args=[self.post.pk]),
+            json.dumps({"liked": liked}),
+            content_type="application/json",
+        )
+
+    def test_like_and_unlike(self):
+        response = self.like(True)
+        self.assertEqual(response.json(), {"liked": True, "likes_count": 1})
+        assert_no_duplicate_queries(response)
+
+        response = self.like(False)
+        self.assertEqual(response.json(), {"liked": False, "likes_count": 0})
+
+    def test_batch_reads_states(self):
+        likes.set_liked(self.reader, self.post.pk, True)
+        response = self.client.get(reverse("like_batch"), {"ids": f"{self.post.pk},0"})
+        self.assertEqual(
+            response.json(),
+            {"posts": {str(self.post.pk): {"liked": True, "likes_count": 1}}},
+        )
+        assert_max_queries(response, 4)
+
+    def test_toggle(self):
+        url = reverse("toggle_like")
+        body = json.dumps({"post_id": self.post.pk})
+        response = self.client.post(url, body, content_type="application/json")
+        self.assertEqual(response.json(), {"liked": True, "likes_count": 1})
+        response = self.client.post(url, body, content_type="application/json")
+        self.assertEqual(response.json(), {"liked": False, "likes_count": 0})
+
+    def test_batch_writes_states(self):
+        other = Post.objects.create(author=self.author, title="u", content="c")
+        likes.set_liked(self.reader, other.pk, True)
+        response = self.client.post(
+            reverse("like_batch"),
+            json.dumps({"set": {str(self.post.pk): True, str(other.pk): False}}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"posts": {
+            str(self.post.pk): {"liked": True, "likes_count": 1},
+            str(other.pk): {"liked": False, "likes_count": 0},
+        }})
+
+    def test_bad_requests(self):
+        self.assertEqual(self.like("yes").status_code, 400)
+        response = self.client.post(
+            reverse("like_post", args=[0]),
+            json.dumps({"liked": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+        too_many = dict.fromkeys(map(str, range(1, likes.MAX_BATCH + 2)), True)
+        response = self.client.post(
+            reverse("like_batch"), json.dumps({"set": too_many}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .. import jobs, likes, notifications
+from ..models import Comment, Notification, Post
+from ..testing import clear_caches
+
+
+class NotificationGroupingTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.alice = User.objects.create_user("alice")
+        self.bob = User.objects.create_user("bob")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+
+    def like(self, user, liked=True):
+        likes.set_liked(user, self.post.pk, liked)
+        jobs.run_pending()
+
+    def test_likes_coalesce_into_one_notification(self):
+        self.like(self.alice)
+        self.like(self.bob)
+
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.sender, self.bob)
+        self.assertEqual(notification.message, "bob and 1 other liked your post")
+        self.assertEqual(notifications.unread_count(self.author), 1)
+
+    def test_repeat_actors_are_counted_once(self):
+        self.like(self.alice)
+        self.like(self.bob)
+        self.like(self.alice, False)
+        self.like(self.alice)
+
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.message, "alice and 1 other liked your post")
+
+    def test_read_notifications_are_not_merged_into(self):
+        self.like(self.alice)
+        notifications.mark_read(self.author, [Notification.objects.get().pk])
+        self.like(self.bob)
+
+        self.assertEqual(Notification.objects.filter(user=self.author).count(), 2)
+        self.assertEqual(notifications.unread_count(self.author), 1)
+
+    def test_kinds_are_kept_apart(self):
+        self.like(self.alice)
+        Comment.objects.create(post=self.post, user=self.alice, content="hi")
+
+        self.assertEqual(
+            set(Notification.objects.values_list("notification_type", flat=True)),
+            {"like", "comment"},
+        )
+
+    def test_own_activity_is_not_notified(self):
+        self.like(self.author)
+        Comment.objects.create(post=self.post, user=self.author, content="hi")
+        self.assertFalse(Notification.objects.exists())
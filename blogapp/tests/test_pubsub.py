@@ -0,0 +1,148 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import likes, notifications, pubsub
+from ..async_views import _event_stream
+from ..models import Post
+from ..testing import clear_caches
+
+
+def parse(chunk):
+    """(event, data) of one SSE message."""
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+
+class LocalBrokerTests(SimpleTestCase):
+
+    async def test_messages_reach_the_subscribed_channels_only(self):
+        broker = pubsub.LocalBroker()
+        with broker.subscribe(["post:1", "user:1"]) as subscription:
+            broker.publish("post:2", "elsewhere")
+            broker.publish("post:1", "first")
+            broker.publish("user:1", "second")
+            self.assertEqual(await subscription.get(), "first")
+            self.assertEqual(await subscription.get(), "second")
+        self.assertEqual(broker._subscribers, {})
+
+    async def test_slow_subscribers_are_dropped(self):
+        broker = pubsub.LocalBroker()
+        subscription = pubsub.Subscription(broker, ["post:1"], maxsize=2)
+        broker._subscribers["post:1"].add(subscription)
+        with self.assertLogs("blogapp.pubsub", "WARNING"):
+            for i in range(3):
+                broker.publish("post:1", i)
+            await asyncio.sleep(0)
+
+        self.assertTrue(subscription.closed)
+        self.assertEqual([await subscription.get() for _ in range(3)], [0, 1, None])
+        self.assertEqual(broker._subscribers, {})
+
+
+class PublishTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.reader = User.objects.create_user("reader")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+
+    def published(self, func):
+        sent = []
+        broker = pubsub.LocalBroker()
+        broker.publish = lambda channel, message: sent.append((channel, message))
+        with mock.patch.object(pubsub, "_broker", broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                func()
+                # nothing goes out before the commit
+                self.assertEqual(sent, [])
+        return sent
+
+    def test_likes_publish_the_post(self):
+        sent = self.published(lambda: likes.set_liked(self.reader, self.post.pk, True))
+        self.assertIn((f"post:{self.post.pk}", {"type": "post", "id": self.post.pk}), sent)
+
+    def test_notifications_publish_to_their_user(self):
+        sent = self.published(lambda: notifications.notify([
+            notifications.Event(self.author.pk, self.reader.pk, self.post.pk, "comment")
+        ]))
+        channel, message = sent[-1]
+        self.assertEqual(channel, f"user:{self.author.pk}")
+        self.assertEqual(message["type"], "notification")
+        self.assertEqual(message["message"], "reader commented on your post")
+
+
+@override_settings(SSE_HEARTBEAT=60, SSE_COUNT_DELAY=0, SSE_MAX_AGE=5)
+class EventStreamTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        pubsub._broker = None
+
+    def tearDown(self):
+        pubsub._broker = None
+
+    async def test_snapshot_then_changed_counts(self):
+        stream = _event_stream(AnonymousUser(), [self.post.pk])
+        self.assertEqual(await anext(stream), "retry: 3000\n\n")
+        self.assertEqual(
+            parse(await anext(stream)),
+            ("counts", {str(self.post.pk): {"likes": 0, "comments": 0}}),
+        )
+
+        await Post.objects.filter(pk=self.post.pk).aupdate(like_count=3)
+        # a burst of changes is pushed once
+        for _ in range(2):
+            pubsub.get_broker().publish(
+                pubsub.post_channel(self.post.pk), {"type": "post", "id": self.post.pk}
+            )
+        self.assertEqual(
+            parse(await anext(stream)),
+            ("counts", {str(self.post.pk): {"likes": 3, "comments": 0}}),
+        )
+        await stream.aclose()
+        self.assertEqual(pubsub.get_broker()._subscribers, {})
+
+    async def test_notifications_carry_the_unread_count(self):
+        stream = _event_stream(self.author, [])
+        await anext(stream)  # retry
+        pubsub.get_broker().publish(pubsub.user_channel(self.author.pk), {
+            "type": "notification", "id": 7, "message": "hi", "created_at": "",
+        })
+        event, data = parse(await anext(stream))
+        self.assertEqual(event, "notification")
+        self.assertEqual(data["url"], reverse("notification_redirect", args=[7]))
+        self.assertEqual(data["unread"], 0)
+        await stream.aclose()
+
+    @override_settings(SSE_HEARTBEAT=0.01)
+    async def test_idle_streams_send_keep_alives(self):
+        stream = _event_stream(AnonymousUser(), [])
+        await anext(stream)
+        self.assertEqual(await anext(stream), ": keep-alive\n\n")
+        await stream.aclose()
+
+    @override_settings(SSE_MAX_AGE=0)
+    async def test_streams_end_after_max_age(self):
+        chunks = [chunk async for chunk in _event_stream(AnonymousUser(), [])]
+        self.assertEqual(chunks, ["retry: 3000\n\n"])
+
+    @override_settings(ROOT_URLCONF="blog.asgi_urls")
+    async def test_events_endpoint(self):
+        response = await self.async_client.get(
+            reverse("events") + f"?post={self.post.pk}&post=x"
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        event, data = parse((await anext(stream)).decode())
+        self.assertEqual(list(data), [str(self.post.pk)])
+        await stream.aclose()
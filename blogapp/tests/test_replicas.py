@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..routers import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, replica_reads
+from ..testing import clear_caches
+
+
+@replica_reads
+def read_view(request):
+    router = ReplicaRouter()
+    return HttpResponse(f"{router.db_for_read(Post)}|{router.db_for_read(Session)}")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaReadsTests(SimpleTestCase):
+
+    factory = RequestFactory()
+
+    def test_gets_read_from_a_replica(self):
+        response = read_view(self.factory.get("/"))
+        # sessions always come from the primary
+        self.assertEqual(response.content, b"replica_0|None")
+
+    def test_pinned_clients_read_from_the_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        self.assertEqual(read_view(request).content, b"None|None")
+
+    def test_writes_read_from_the_primary(self):
+        self.assertEqual(read_view(self.factory.post("/")).content, b"None|None")
+
+    def test_undecorated_code_reads_from_the_primary(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Post))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        self.assertEqual(read_view(self.factory.get("/")).content, b"None|None")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(ReplicaRouter().allow_migrate("replica_0", "blogapp"))
+        self.assertIsNone(ReplicaRouter().allow_migrate("default", "blogapp"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+
+    factory = RequestFactory()
+
+    def respond(self, request, status=200):
+        return ReplicaPinMiddleware(lambda request: HttpResponse(status=status))(request)
+
+    def test_successful_writes_pin_the_client(self):
+        response = self.respond(self.factory.post("/"))
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+        self.assertTrue(response.cookies[PIN_COOKIE]["httponly"])
+
+    def test_reads_and_failed_writes_do_not(self):
+        self.assertNotIn(PIN_COOKIE, self.respond(self.factory.get("/")).cookies)
+        self.assertNotIn(PIN_COOKIE, self.respond(self.factory.post("/"), 400).cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_nothing_to_pin_without_replicas(self):
+        self.assertNotIn(PIN_COOKIE, self.respond(self.factory.post("/")).cookies)
+
+
+class ReplicaPinRequestTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user")
+        self.post = Post.objects.create(author=self.user, title="t", content="c")
+        self.client.force_login(self.user)
+
+    @override_settings(DATABASE_REPLICAS=["replica_0"])
+    def test_a_comment_pins_the_next_page(self):
+        response = self.client.post(
+            reverse("post_detail", args=[self.post.pk]), {"content": "hi"}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertIn(PIN_COOKIE, self.client.cookies)
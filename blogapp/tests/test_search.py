@@ -0,0 +1,89 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+from ..testing import clear_caches, strict_query_budgets
+
+
+@skipUnless(connection.vendor in search.BACKENDS, "no full-text index on this database")
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("writer")
+
+    def post(self, title, content):
+        return Post.objects.create(author=self.author, title=title, content=content)
+
+    def results(self, query):
+        return list(search.search_posts(query))
+
+    def test_title_matches_rank_first(self):
+        in_body = self.post("Notes", "<p>a long text about caching strategies</p>")
+        in_title = self.post("Caching", "<p>short</p>")
+        self.assertEqual([post.pk for post in self.results("caching")], [in_title.pk, in_body.pk])
+
+    def test_snippet_highlights_and_escapes(self):
+        self.post("t", "<p>the &lt;b&gt; tag and an index over words</p>")
+        [result] = self.results("index")
+        self.assertIn("<mark>index</mark>", result.snippet)
+        self.assertIn("&lt;b&gt;", result.snippet)
+        self.assertNotIn("<p>", result.snippet)
+
+    def test_author_name_is_indexed(self):
+        post = self.post("t", "c")
+        self.assertEqual([p.pk for p in self.results("writer")], [post.pk])
+
+    def test_edits_and_deletes_update_the_index(self):
+        post = self.post("Old title", "c")
+        post.title = "Fresh title"
+        post.save()
+        self.assertEqual(self.results("old"), [])
+        self.assertEqual([p.pk for p in self.results("fresh")], [post.pk])
+
+        post.delete()
+        self.assertEqual(self.results("fresh"), [])
+
+    def test_rename_reindexes_the_authors_posts(self):
+        post = self.post("t", "c")
+        self.author.username = "novelist"
+        self.author.save()
+        self.assertEqual([p.pk for p in self.results("novelist")], [post.pk])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.post("t", "c")
+        for query in ('"', "a OR", "NEAR(", "*", "-"):
+            self.assertEqual(self.results(query), [])
+
+
+@skipUnless(connection.vendor == "sqlite", "prefix matching is SQLite only")
+class SQLiteSearchTests(TestCase):
+
+    def test_words_match_as_prefixes(self):
+        author = User.objects.create_user("writer")
+        post = Post.objects.create(author=author, title="Optimization", content="c")
+        self.assertEqual([p.pk for p in search.search_posts("optim")], [post.pk])
+
+
+@strict_query_budgets
+class SearchViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("writer")
+        Post.objects.create(author=self.author, title="Caching", content="c")
+
+    def test_results_page(self):
+        response = self.client.get(reverse("search_posts"), {"q": "caching"})
+        self.assertContains(response, "Caching")
+
+    def test_exact_username_goes_to_the_profile(self):
+        response = self.client.get(reverse("search_posts"), {"q": "WRITER"})
+        self.assertRedirects(
+            response, reverse("user_profile", args=["writer"]), fetch_redirect_response=False
+        )
@@ -0,0 +1,42 @@
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Post
+from ..routers import READER, WRITER, SQLiteReadWriteRouter
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite only")
+class SQLitePragmaTests(TestCase):
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned(self):
+        self.assertEqual(self.pragma("foreign_keys"), 1)
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("temp_store"), 2)  # MEMORY
+        self.assertLess(self.pragma("cache_size"), 0)  # in KiB
+
+
+class SQLiteReadWriteRouterTests(SimpleTestCase):
+
+    router = SQLiteReadWriteRouter()
+
+    def test_reads_go_to_the_reader(self):
+        self.assertEqual(self.router.db_for_read(Post), READER)
+        self.assertEqual(self.router.db_for_write(Post), WRITER)
+
+    def test_only_the_writer_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate(WRITER, "blogapp"))
+        self.assertFalse(self.router.allow_migrate(READER, "blogapp"))
+
+
+class SQLiteReadWriteTransactionTests(TestCase):
+
+    def test_reads_in_a_transaction_stay_on_the_writer(self):
+        with transaction.atomic():
+            self.assertEqual(SQLiteReadWriteRouter().db_for_read(Post), WRITER)
@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import usercards
+from ..models import Post, Profile
+from ..testing import clear_caches
+
+
+class UserCardTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user", first_name="Ada", last_name="L")
+        self.other = User.objects.create_user("other")
+
+    def test_signup_does_not_create_a_profile(self):
+        self.assertFalse(Profile.objects.exists())
+
+    def test_cards_are_loaded_in_one_query_and_then_cached(self):
+        with self.assertNumQueries(1):
+            cards = usercards.get_cards([self.user.pk, self.other.pk, 0])
+        self.assertEqual(set(cards), {self.user.pk, self.other.pk})
+        self.assertEqual(cards[self.user.pk].full_name, "Ada L")
+        self.assertEqual(cards[self.other.pk].avatar, "")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(usercards.get_cards([self.user.pk, self.other.pk]), cards)
+
+    def test_only_missing_cards_are_queried(self):
+        usercards.get_card(self.user.pk)
+        with self.assertNumQueries(1):
+            cards = usercards.get_cards([self.user.pk, self.other.pk])
+        self.assertEqual(cards[self.other.pk].username, "other")
+
+    def test_attach(self):
+        posts = [
+            Post.objects.create(author=author, title="t", content="c")
+            for author in (self.user, self.other, self.user)
+        ]
+        usercards.attach(posts)
+        self.assertEqual(
+            [post.author_card.username for post in posts], ["user", "other", "user"]
+        )
+
+    def test_user_save_drops_the_card(self):
+        usercards.get_card(self.user.pk)
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(usercards.get_card(self.user.pk).username, "renamed")
+
+    def test_login_keeps_the_card(self):
+        usercards.get_card(self.user.pk)
+        self.client.force_login(self.user)
+        with self.assertNumQueries(0):
+            usercards.get_card(self.user.pk)
+
+    def test_profile_save_drops_the_card(self):
+        usercards.get_card(self.user.pk)
+        Profile.objects.create(user=self.user)
+        with self.assertNumQueries(1):
+            usercards.get_card(self.user.pk)
+
+    def test_user_delete_drops_the_card(self):
+        usercards.get_card(self.other.pk)
+        self.other.delete()
+        self.assertIsNone(usercards.get_card(self.other.pk))
+
+    def test_profile_page_creates_the_profile_on_first_visit(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+
+class UserCardTagTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("user")
+
+    def render(self, source, **context):
+        return Template("{% load blog_tags %}" + source).render(Context(context))
+
+    def test_card_without_a_picture_shows_initials(self):
+        html = self.render(
+            "{% user_card user_id as card %}{% card_avatar card 'avatar' %}",
+            user_id=self.user.pk,
+        )
+        self.assertIn("ui-avatars.com", html)
+        self.assertIn('alt="user"', html)
+        self.assertIn('width="32"', html)
+
+    def test_card_with_a_picture_has_a_2x_candidate(self):
+        card = usercards.UserCard(self.user.pk, "user", "", "/a-32.jpg", "/a-64.jpg")
+        html = self.render("{% card_avatar card %}", card=card)
+        self.assertIn('srcset="/a-32.jpg 1x, /a-64.jpg 2x"', html)
+
+    def test_missing_card(self):
+        html = self.render("{% user_card 0 as card %}{% card_avatar card %}")
+        self.assertIn("ui-avatars.com", html)
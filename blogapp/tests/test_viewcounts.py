@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import authors, viewcounts
+from ..models import AuthorStats, Post, PostDailyStats
+from ..testing import clear_caches
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600, VIEW_COUNTER_FLUSH_THRESHOLD=3)
+class LocalViewBufferTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = User.objects.create_user("author")
+        self.post = Post.objects.create(author=self.author, title="t", content="c")
+        authors.get_stats(self.author)
+
+        buffer_patch = mock.patch.object(viewcounts, "_buffer", viewcounts.LocalViewBuffer())
+        self.buffer = buffer_patch.start()
+        self.addCleanup(buffer_patch.stop)
+
+    def views(self):
+        self.post.refresh_from_db(fields=["views"])
+        return self.post.views
+
+    def test_views_wait_for_the_flush(self):
+        viewcounts.record_view(self.post.pk)
+        viewcounts.record_view(self.post.pk)
+        self.assertEqual(self.views(), 0)
+
+        self.assertEqual(viewcounts.flush(), 2)
+        self.assertEqual(self.views(), 2)
+        self.assertEqual(AuthorStats.objects.get(user=self.author).total_views, 2)
+        self.assertEqual(PostDailyStats.objects.get(post=self.post).views, 2)
+        self.assertEqual(viewcounts.flush(), 0)
+
+    def test_threshold_flushes_inline(self):
+        for _ in range(3):
+            viewcounts.record_view(self.post.pk)
+        self.assertEqual(self.views(), 3)
+
+    def test_failed_flush_keeps_the_views(self):
+        viewcounts.record_view(self.post.pk)
+        with mock.patch.object(viewcounts, "write_views", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                viewcounts.flush()
+        self.assertEqual(viewcounts.flush(), 1)
+        self.assertEqual(self.views(), 1)
+
+    def test_post_page_counts_304s_too(self):
+        url = reverse("post_detail", args=[self.post.pk])
+        response = self.client.get(url)
+        self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.client.get(reverse("post_detail", args=[0]))
+        self.assertEqual(self.buffer.drain(), {self.post.pk: 2})
+
+
+@override_settings(VIEW_COUNTER_CACHE="default", VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class CacheViewBufferTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.buffer = viewcounts.CacheViewBuffer()
+
+    def test_drain_takes_what_was_added(self):
+        self.buffer.add(1)
+        self.buffer.add(1)
+        self.buffer.add(2, 5)
+        self.assertEqual(self.buffer.drain(), {1: 2, 2: 5})
+        self.assertEqual(self.buffer.drain(), {})
+
+    def test_restore_puts_views_back(self):
+        self.buffer.add(1)
+        self.buffer.restore(self.buffer.drain())
+        self.assertEqual(self.buffer.drain(), {1: 1})
+
+    def test_one_inline_flush_per_interval(self):
+        self.assertTrue(self.buffer.add(1))
+        self.assertFalse(self.buffer.add(1))
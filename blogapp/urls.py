@@ -11,6 +11,7 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('profile/', views.profile_view, name='profile'),
     path("profile/<str:username>/", views.profile_view, name="user_profile"),
+    path("profile/<str:username>/posts/", views.author_posts, name="author_posts"),
     path('notifications/', views.notifications, name='notifications'),
     path('notification/<int:id>/', views.notification_redirect, name='notification_redirect'),
     path('create/', views.create_post, name='create_post'),
@@ -19,7 +20,9 @@ urlpatterns = [
     path('post/<int:post_id>/edit/', views.edit_post_view, name='edit_post'),
     path('delete-post/<int:post_id>/', views.delete_post, name='delete_post'),
     path('comment/delete/<int:comment_id>/', views.delete_comment, name='delete_comment'),
+    path('comment/<int:comment_id>/replies/', views.comment_replies, name='comment_replies'),
     path("like/<int:post_id>/", views.like_post, name="like_post"),
     path("like-toggle/", views.toggle_like, name="toggle_like"),
+    path("likes/batch/", views.like_batch, name="like_batch"),
     path("search/", views.search_posts, name="search_posts"),
 ]
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Cached author cards.
+
+A card is what a list page prints about a user: username, display name
+and avatar URLs, already built so no Cloudinary URL building happens per
+card. Cards live in settings.USER_CARD_CACHE keyed by user id; a page
+fetches every card it needs with one get_many and one query for the
+misses. Signals drop a card whenever its User or Profile is saved.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from .images import avatar_url
+
+
+UserCard = namedtuple("UserCard", ["id", "username", "full_name", "avatar", "avatar_2x"])
+
+# display size of the card avatar, in CSS pixels
+AVATAR_SIZE = 32
+
+
+def _cache():
+    return caches[settings.USER_CARD_CACHE]
+
+
+def _key(user_id):
+    return f"user-card:{user_id}"
+
+
+def _load(user_ids):
+    rows = (
+        get_user_model().objects
+        .filter(pk__in=user_ids)
+        .values_list("pk", "username", "first_name", "last_name", "profile__profile_picture")
+    )
+    return {
+        pk: UserCard(
+            id=pk,
+            username=username,
+            full_name=f"{first_name} {last_name}".strip(),
+            avatar=avatar_url(picture, AVATAR_SIZE),
+            avatar_2x=avatar_url(picture, AVATAR_SIZE * 2),
+        )
+        for pk, username, first_name, last_name, picture in rows
+    }
+
+
+def get_cards(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+
+    cache = _cache()
+    found = cache.get_many([_key(user_id) for user_id in user_ids])
+    cards = {card.id: card for card in map(UserCard._make, found.values())}
+
+    missing = user_ids - cards.keys()
+    if missing:
+        loaded = _load(missing)
+        # plain tuples, so any cache backend can store them
+        cache.set_many(
+            {_key(pk): tuple(card) for pk, card in loaded.items()},
+            timeout=settings.USER_CARD_TIMEOUT,
+        )
+        cards.update(loaded)
+    return cards
+
+
+def get_card(user_id):
+    return get_cards([user_id]).get(user_id)
+
+
+def attach(objs, id_attr="author_id", attr="author_card"):
+    """Set ``obj.<attr>`` to the card of ``obj.<id_attr>`` for every object."""
+    cards = get_cards(getattr(obj, id_attr) for obj in objs)
+    for obj in objs:
+        setattr(obj, attr, cards.get(getattr(obj, id_attr)))
+    return objs
+
+
+def forget(user_ids):
+    _cache().delete_many([_key(user_id) for user_id in user_ids])
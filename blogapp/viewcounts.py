@@ -0,0 +1,230 @@
+"""
+Buffered post view counting.
+
+post_detail used to issue one UPDATE per pageview. Views are now added to a
+buffer and written back in batches of ``views = views + n`` updates, so
+Post.views (and the dashboard totals built on it) are eventually consistent.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from . import analytics, counters
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# BUFFERS
+# =========================
+class LocalViewBuffer:
+    """Pending views held in this process, flushed by the request thread."""
+
+    def __init__(self):
+        self._pending = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, post_id, n=1):
+        with self._lock:
+            self._pending[post_id] += n
+            self._total += n
+            return self._is_due()
+
+    def _is_due(self):
+        interval = settings.VIEW_COUNTER_FLUSH_INTERVAL
+        threshold = settings.VIEW_COUNTER_FLUSH_THRESHOLD
+        return (
+            self._total >= threshold
+            or time.monotonic() - self._last_flush >= interval
+        )
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._total = 0
+            self._last_flush = time.monotonic()
+        return dict(pending)
+
+    def restore(self, pending):
+        with self._lock:
+            self._pending.update(pending)
+            self._total += sum(pending.values())
+
+
+class CacheViewBuffer:
+    """
+    Pending views held in settings.VIEW_COUNTER_CACHE, which settings
+    require to be shared between processes with atomic incr/add (Redis or
+    Memcached), so every worker feeds the same buffer, a separate process
+    can flush it and only one worker at a time takes the flush lock.
+
+    The set of dirty post ids is kept under a single key and updated without
+    a lock, so a concurrent write can drop an id. Its count is not lost: it
+    stays in the cache and is flushed the next time that post is viewed.
+    """
+
+    prefix = "viewcount:"
+    dirty_key = "viewcount:dirty"
+    flush_lock_key = "viewcount:flush-lock"
+
+    def __init__(self):
+        self.cache = caches[settings.VIEW_COUNTER_CACHE]
+
+    def _key(self, post_id):
+        return f"{self.prefix}{post_id}"
+
+    def add(self, post_id, n=1):
+        cache = self.cache
+        key = self._key(post_id)
+        try:
+            cache.incr(key, n)
+        except ValueError:
+            if not cache.add(key, n, timeout=None):
+                cache.incr(key, n)
+
+        dirty = cache.get(self.dirty_key, set())
+        if post_id not in dirty:
+            dirty.add(post_id)
+            cache.set(self.dirty_key, dirty, timeout=None)
+
+        # at most one inline flush per interval across all workers
+        return cache.add(
+            self.flush_lock_key, 1,
+            timeout=settings.VIEW_COUNTER_FLUSH_INTERVAL,
+        )
+
+    def drain(self):
+        cache = self.cache
+        dirty = cache.get(self.dirty_key, set())
+        cache.delete(self.dirty_key)
+
+        counts = cache.get_many([self._key(post_id) for post_id in dirty])
+        pending = {}
+        for post_id in dirty:
+            n = counts.get(self._key(post_id), 0)
+            if n <= 0:
+                continue
+            try:
+                # decr rather than delete keeps views that landed meanwhile
+                cache.decr(self._key(post_id), n)
+            except ValueError:
+                pass
+            pending[post_id] = n
+        return pending
+
+    def restore(self, pending):
+        for post_id, n in pending.items():
+            self.add(post_id, n)
+
+
+BACKENDS = {
+    "local": LocalViewBuffer,
+    "cache": CacheViewBuffer,
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = BACKENDS[settings.VIEW_COUNTER_BACKEND]()
+    return _buffer
+
+
+# =========================
+# PUBLIC API
+# =========================
+def write_views(pending):
+    # one UPDATE per distinct increment rather than one per post
+    by_amount = defaultdict(list)
+    for post_id, n in pending.items():
+        by_amount[n].append(post_id)
+
+    with transaction.atomic():
+        for n, post_ids in by_amount.items():
+            Post.objects.filter(pk__in=post_ids).update(views=F("views") + n)
+            counters.adjust_author_stats(post_ids, total_views=n)
+        analytics.add("views", pending)
+
+
+def flush():
+    buffer = get_buffer()
+    pending = buffer.drain()
+    if not pending:
+        return 0
+
+    try:
+        write_views(pending)
+    except DatabaseError:
+        buffer.restore(pending)
+        raise
+
+    return sum(pending.values())
+
+
+def record_view(post_id):
+    if not get_buffer().add(post_id):
+        return
+
+    try:
+        flush()
+    except DatabaseError:
+        # the views are back in the buffer; the next flush retries them
+        logger.exception("Could not flush buffered post views")
+
+
+def _counted(request, response):
+    return request.method == "GET" and response.status_code in (200, 304)
+
+
+def counts_views(view):
+    """Record a view for every GET of a post page, 304s included."""
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, id, *args, **kwargs):
+            response = await view(request, id, *args, **kwargs)
+            if _counted(request, response):
+                # may flush the buffer to the database
+                await sync_to_async(record_view)(id)
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, id, *args, **kwargs):
+        response = view(request, id, *args, **kwargs)
+        if _counted(request, response):
+            record_view(id)
+        return response
+
+    return wrapper
+
+
+def flush_on_shutdown():
+    """
+    Write what this process still holds; called by the server when a
+    worker stops (see gunicorn.conf.py). Never from an exit hook: after
+    `manage.py test` that would write to the real database.
+    """
+    if isinstance(_buffer, LocalViewBuffer):
+        try:
+            flush()
+        except Exception:
+            logger.exception("Could not flush buffered post views on shutdown")
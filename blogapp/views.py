@@ -4,13 +4,27 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Sum
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.functions import Upper
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.utils.timezone import now
 
 from .models import Post, Profile, Comment
 from .forms import PostForm, ProfilePictureForm
+from . import analytics, authors, fragments, images, likes, search
+from .comments import comment_subtree, comment_threads
+from .feed import InvalidCursor, get_feed_page
+from .conditional import (
+    cacheable,
+    post_etag,
+    post_last_modified,
+    post_list_etag,
+    post_list_last_modified,
+    profile_etag,
+    search_etag,
+)
+from .routers import replica_reads
+from .viewcounts import counts_views
 
 
 # =========================
@@ -18,10 +32,22 @@ from .forms import PostForm, ProfilePictureForm
 # =========================
 def home_view(request):
     return render(request, 'blog/post_list.html')
+def _feed_page(request):
+    try:
+        return get_feed_page(request.user, request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Invalid feed cursor")
+
+
 @login_required
+@replica_reads
 def feed_view(request):
-    posts = Post.objects.all().order_by('-created_at')
-    return render(request, 'blog/feed.html', {'posts': posts})
+    page = _feed_page(request)
+    fragments.attach_versions(page.posts)
+    return render(request, 'blog/feed.html', {
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
+    })
 
 
 
@@ -34,19 +60,11 @@ def settings_view(request):
 # =========================
 # PUBLIC FEED (FYP)
 # =========================
+@replica_reads
+@counts_views
+@cacheable(post_etag, post_last_modified)
 def post_detail(request, id):
-    post = get_object_or_404(Post, id=id)
-
-    # increase views
-    post.views += 1
-    post.save(update_fields=['views'])
-
-    comments = Comment.objects.filter(
-        post=post,
-        parent__isnull=True
-    ).select_related('user')
-
-    related_posts = Post.objects.exclude(id=post.id)[:5]
+    post = get_object_or_404(Post.objects.select_related('author'), id=id)
 
     # =====================
     # ADD COMMENT / REPLY
@@ -72,12 +90,28 @@ def post_detail(request, id):
 
         return redirect('post_detail', id=post.id)
 
+    post.cache_version = fragments.get_versions([post.pk])[post.pk]
+    comments = comment_threads(post, request.GET.get('comments'))
+    related_posts = (
+        Post.objects.exclude(id=post.id).for_viewer(request.user).for_list()[:5]
+    )
+
     return render(request, "blog/post_detail.html", {
         "post": post,
+        "is_liked": (
+            request.user.is_authenticated
+            and likes.is_liked(request.user, post.pk)
+        ),
         "comments": comments,
         "related_posts": related_posts,
     })
 
+def comment_replies(request, comment_id):
+    comment = comment_subtree(comment_id)
+    return render(request, "blog/comment_replies.html", {
+        "comment": comment,
+    })
+
 # =========================
 # DELETE COMMENT
 # =========================
@@ -85,12 +119,10 @@ def post_detail(request, id):
 def delete_comment(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
 
-    if request.user == comment.user:
-        post_id = comment.post.id
+    if request.user.id == comment.user_id:
         comment.delete()
-        return redirect('post_detail', id=post_id)
 
-    return redirect('post_detail', id=comment.post.id)
+    return redirect('post_detail', id=comment.post_id)
 
 # =========================
 # AUTH
@@ -152,14 +184,28 @@ def logout_view(request):
 # =========================
 @login_required
 def dashboard(request):
-    posts = Post.objects.filter(author=request.user)
-    total_views = posts.aggregate(total=Sum('views'))['total'] or 0
+    days = analytics.clean_range(request.GET.get('days'))
+    stats = authors.get_stats(request.user)
+    recent_posts = (
+        Post.objects
+        .filter(author=request.user)
+        .for_viewer(request.user)
+        .for_list()
+        .order_by('-created_at')[:4]
+    )
+    series = analytics.author_series(request.user, days)
 
     context = {
-        'posts': posts,
-        'total_views': total_views,
-        'chart_labels': json.dumps([p.title[:15] for p in posts]),
-        'chart_data': json.dumps([p.views for p in posts]),
+        'posts': recent_posts,
+        'post_count': stats.post_count,
+        'total_views': stats.total_views,
+        'days': days,
+        'ranges': analytics.RANGES,
+        'top_posts': analytics.top_posts(request.user, days),
+        'chart_labels': series.labels,
+        'chart_data': series.views,
+        'chart_likes': series.likes,
+        'chart_comments': series.comments,
     }
 
     return render(request, 'dashboard.html', context)
@@ -168,14 +214,22 @@ def dashboard(request):
 # =========================
 # MY POSTS
 # =========================
+def _author_page(request, author):
+    try:
+        return authors.get_posts_page(author, request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Invalid page cursor")
+
+
 @login_required
 def my_posts(request):
-    posts = (
-        Post.objects
-        .filter(author=request.user)
-        .order_by('-created_at')
-    )
-    return render(request, 'my_posts.html', {'posts': posts})
+    page = _author_page(request, request.user)
+    return render(request, 'my_posts.html', {
+        'author': request.user,
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
+        'is_own_profile': True,
+    })
 
 
 # =========================
@@ -184,16 +238,19 @@ def my_posts(request):
 
 
 @login_required
+@replica_reads
+@cacheable(profile_etag)
 def profile_view(request, username=None):
 
     # 🔹 If username exists → view someone else
     if username:
-        user_obj = get_object_or_404(User, username=username)
+        user_obj = get_object_or_404(User.objects.select_related("author_stats"), username=username)
     else:
         user_obj = request.user
 
-    profile = user_obj.profile
-    posts = Post.objects.filter(author=user_obj).order_by('-created_at')
+    # created on first visit rather than by a post_save INSERT per signup
+    profile, _ = Profile.objects.get_or_create(user=user_obj)
+    page = _author_page(request, user_obj)
 
     # 🔹 Only allow edit if it is YOUR profile
     if request.method == "POST" and user_obj == request.user:
@@ -207,7 +264,9 @@ def profile_view(request, username=None):
         if email:
             user_obj.email = email.strip()
 
-        user_obj.save()
+        # request.user may come from the auth cache: only write the
+        # fields edited here, never a stale password or is_active
+        user_obj.save(update_fields=["username", "email"])
 
         if "profile_picture" in request.FILES:
             profile.profile_picture = request.FILES["profile_picture"]
@@ -217,10 +276,26 @@ def profile_view(request, username=None):
 
     return render(request, "profile.html", {
         "profile": profile,
-        "posts": posts,
+        "author": user_obj,
+        "stats": authors.get_stats(user_obj),
+        "posts": page.posts,
+        "next_cursor": page.next_cursor,
         "is_own_profile": user_obj == request.user
     })
 
+
+@login_required
+@replica_reads
+def author_posts(request, username):
+    """The next page of an author's posts, for infinite scroll."""
+    author = get_object_or_404(User, username=username)
+    page = _author_page(request, author)
+    html = render_to_string("blog/author_posts.html", {
+        "posts": page.posts,
+        "is_own_profile": author == request.user,
+    }, request=request)
+    return JsonResponse({"html": html, "next_cursor": page.next_cursor})
+
 # =========================
 # CREATE / EDIT / DELETE POST
 # =========================
@@ -231,7 +306,11 @@ def create_post(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        # stored and resized by the job worker, not in this request
+        post.image = None
         post.save()
+        if 'image' in request.FILES:
+            images.queue_upload(post, request.FILES['image'])
         return redirect('dashboard')
 
     return render(request, 'create_post.html', {'form': form})
@@ -240,6 +319,7 @@ def create_post(request):
 @login_required
 def edit_post_view(request, post_id):
     post = get_object_or_404(Post, id=post_id, author=request.user)
+    current_image = post.image.name
     form = PostForm(
         request.POST or None,
         request.FILES or None,
@@ -247,7 +327,15 @@ def edit_post_view(request, post_id):
     )
 
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        if 'image' in request.FILES:
+            # keep showing the old image until the worker has the new one
+            post.image = current_image
+        post.save()
+        if 'image' in request.FILES:
+            images.queue_upload(post, request.FILES['image'])
+        elif 'image' in form.changed_data:
+            images.queue_variants(post)
         return redirect('my_posts')
 
     return render(request, 'edit_post.html', {'form': form})
@@ -266,17 +354,15 @@ def delete_post(request, post_id):
 # =========================
 # AUTO CREATE PROFILE
 # =========================
-@receiver(post_save, sender=User)
-def create_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
-
 
 
+@replica_reads
+@cacheable(post_list_etag, post_list_last_modified)
 def post_list(request):
-    posts = Post.objects.select_related("author").order_by("-created_at")
+    page = _feed_page(request)
     return render(request, "blog/post_list.html", {
-        "posts": posts
+        "posts": page.posts,
+        "next_cursor": page.next_cursor,
     })
 
 
@@ -291,26 +377,84 @@ from .models import Post
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
+
+
+def _json_body(request):
+    if not request.body:
+        return {}
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _like_response(state):
+    return JsonResponse({
+        "liked": state.liked,
+        "likes_count": state.likes_count
+    })
+
+
+def _change_like(request, post_id, liked=None):
+    # "liked": true/false sets the state (safe to retry), no value toggles
+    if liked is not None and not isinstance(liked, bool):
+        return JsonResponse({"error": "liked must be true or false"}, status=400)
+    try:
+        if liked is None:
+            state = likes.toggle(request.user, post_id)
+        else:
+            state = likes.set_liked(request.user, post_id, liked)
+    except likes.UnknownPost:
+        return JsonResponse({"error": "Post not found"}, status=404)
+    return _like_response(state)
+
 
 @login_required
 @require_POST
 def toggle_like(request):
-    data = json.loads(request.body)
-    post_id = data.get("post_id")
+    data = _json_body(request)
+    if data is None or "post_id" not in data:
+        return JsonResponse({"error": "post_id is required"}, status=400)
+    return _change_like(request, data["post_id"], data.get("liked"))
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def like_batch(request):
+    """
+    GET ?ids=1,2,3 returns the viewer's liked state for many posts; POST
+    {"set": {"1": true, "2": false}} applies them first. Unknown ids are
+    left out of the response.
+    """
+    if request.method == "POST":
+        data = _json_body(request)
+        changes = data.get("set") if data else None
+        if not isinstance(changes, dict):
+            return JsonResponse({"error": "set must map post ids to true/false"}, status=400)
+    else:
+        changes = dict.fromkeys(request.GET.get("ids", "").split(","))
 
-    post = Post.objects.get(id=post_id)
+    try:
+        changes = {int(pk): liked for pk, liked in changes.items() if pk != ""}
+    except ValueError:
+        return JsonResponse({"error": "post ids must be integers"}, status=400)
+    if len(changes) > likes.MAX_BATCH:
+        return JsonResponse({"error": f"at most {likes.MAX_BATCH} posts per request"}, status=400)
 
-    if request.user in post.likes.all():
-        post.likes.remove(request.user)
-        liked = False
+    if request.method == "POST":
+        if not all(isinstance(liked, bool) for liked in changes.values()):
+            return JsonResponse({"error": "set must map post ids to true/false"}, status=400)
+        states = likes.apply_batch(request.user, changes)
     else:
-        post.likes.add(request.user)
-        liked = True
+        states = likes.get_states(request.user, list(changes))
 
     return JsonResponse({
-        "liked": liked,
-        "likes_count": post.likes.count()
+        "posts": {
+            str(pk): {"liked": state.liked, "likes_count": state.likes_count}
+            for pk, state in states.items()
+        }
     })
 
 
@@ -319,16 +463,22 @@ def toggle_like(request):
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from .models import Notification
+from .notifications import mark_read
+
+NOTIFICATIONS_PER_PAGE = 30
 
 @login_required
 def notifications(request):
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by("-created_at")
+    notifications = Paginator(
+        Notification.objects.filter(user=request.user).order_by("-created_at", "-id"),
+        NOTIFICATIONS_PER_PAGE,
+    ).get_page(request.GET.get("page"))
 
-    # mark as read
-    notifications.filter(is_read=False).update(is_read=True)
+    # mark as read, only what is on this page; the rows keep their
+    # unread styling for this render
+    mark_read(request.user, [n.id for n in notifications if not n.is_read])
 
     return render(request, "blog/notifications.html", {
         "notifications": notifications
@@ -344,61 +494,59 @@ def notification_redirect(request, id):
     )
 
     # mark as read
-    notification.is_read = True
-    notification.save()
+    mark_read(request.user, [notification.id])
 
     # redirect to related post
-    if notification.post:
-        return redirect('post_detail', notification.post.id)
+    if notification.post_id:
+        return redirect('post_detail', notification.post_id)
 
     return redirect('notifications')
 
 
 @login_required
+@require_POST
 def like_post(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    user = request.user
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    return _change_like(request, post_id, data.get("liked"))
 
-    if user in post.likes.all():
-        post.likes.remove(user)
-        liked = False
-    else:
-        post.likes.add(user)
-        liked = True
 
-    return JsonResponse({
-        "liked": liked,
-        "likes_count": post.likes.count()
-    })
-
-
-from django.db.models import Q
+from django.db.models import Q, Value
+@replica_reads
+@cacheable(search_etag)
 def search_posts(request):
     query = request.GET.get("q", "").strip()
 
     # 🔹 If username exists → go to profile
+    # UPPER(username) matches auth_user_username_upper_idx; both sides go
+    # through the database's UPPER, which only folds ASCII on SQLite
     try:
-        user = User.objects.get(username__iexact=query)
+        user = User.objects.alias(username_upper=Upper("username")).get(
+            username_upper=Upper(Value(query))
+        )
         return redirect("user_profile", username=user.username)
     except User.DoesNotExist:
         pass
 
     # 🔹 Else search posts
-    posts = Post.objects.filter(title__icontains=query)
+    posts = search.search_posts(query, request.GET.get("page"), viewer=request.user)
 
-    return render(request, "search_results.html", {
+    return render(request, "blog/search_results.html", {
         "query": query,
         "posts": posts
     })
 
 
 def user_profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=user).order_by('-created_at')
+    user = get_object_or_404(User.objects.select_related("author_stats"), username=username)
+    page = _author_page(request, user)
 
     return render(request, 'profile_detail.html', {
         'profile_user': user,
-        'posts': posts,
+        'stats': authors.get_stats(user),
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
     })
 
 
@@ -0,0 +1,8 @@
+# Read by gunicorn from the working directory.
+
+
+def worker_exit(server, worker):
+    # views buffered in this worker (VIEW_COUNTER_BACKEND="local")
+    from blogapp import viewcounts
+
+    viewcounts.flush_on_shutdown()